@@ -2,12 +2,15 @@
 Main application module for the data streaming service.
 This Flask application provides APIs for monitoring and managing the data streaming process.
 """
+import hashlib
+import hmac
 import logging
-import threading
 import os
-from flask import Flask, jsonify, request
+import queue
+import threading
+from contextlib import contextmanager
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-from apscheduler.schedulers.background import BackgroundScheduler
 
 from src.config.config import (
     APP_HOST,
@@ -15,38 +18,90 @@ from src.config.config import (
     DEBUG,
     LOG_LEVEL,
     LOG_FORMAT,
-    KAFKA_TOPIC
+    ADMIN_USERNAME,
+    ADMIN_PASSWORD
 )
 from src.connectors.sqs_connector import SQSConnector
 from src.connectors.kafka_connector import KafkaConnector
 from src.utils.stream_processor import StreamProcessor
-
-# Set up logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format=LOG_FORMAT
-)
+from src.utils.metrics import Counters, StreamStatus
+
+# Set up logging, leaving handlers installed by the host process in place
+_log_formatter = logging.Formatter(LOG_FORMAT)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(_log_formatter)
+_root_logger = logging.getLogger()
+if not _root_logger.handlers:
+    _root_logger.addHandler(_log_handler)
+    _root_logger.setLevel(LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+def _credential_digest(value: str) -> bytes:
+    """Hash a credential to a fixed-length digest for constant-time comparison."""
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=32).digest()
+
+# Admin credential digests, computed once at startup
+_ADMIN_USERNAME_HASH = _credential_digest(ADMIN_USERNAME)
+_ADMIN_PASSWORD_HASH = _credential_digest(ADMIN_PASSWORD)
+
 # Create Flask application
 app = Flask(__name__)
 CORS(app)
 
-# Initialize connectors
+class _ConnectorPool:
+    """
+    Pool of connectors for API request handlers.
+    
+    Concurrent requests each check out their own connector instead of
+    contending on the one used by the streaming thread. Connectors are
+    created lazily, up to max_size, and returned to the pool after use.
+    """
+    
+    def __init__(self, factory, max_size: int = 4):
+        """
+        Initialize the connector pool.
+        
+        Args:
+            factory: Callable that creates a new connector
+            max_size: Maximum number of connectors in use at once
+        """
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+    
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connector for the duration of a with-block.
+        
+        A connector is only returned to the pool if the block completes
+        without an exception. Otherwise it is closed, so a broken connector
+        is neither reused nor left running.
+        """
+        with self._slots:
+            try:
+                connector = self._idle.get_nowait()
+            except queue.Empty:
+                connector = self._factory()
+            try:
+                yield connector
+            except Exception:
+                connector.close()
+                raise
+            self._idle.put(connector)
+
+# Initialize connectors for the streaming thread
 sqs_connector = SQSConnector()
 kafka_connector = KafkaConnector()
 
+# Kafka connectors for admin requests, separate from the streaming connector
+kafka_pool = _ConnectorPool(KafkaConnector)
+
 # Initialize stream processor
 stream_processor = StreamProcessor(sqs_connector, kafka_connector)
 
 # Metrics for monitoring
-metrics = {
-    'messages_processed': 0,
-    'processing_errors': 0,
-    'last_processing_time': None,
-    'kafka_send_errors': 0,
-    'stream_status': 'stopped'
-}
+metrics = Counters()
 
 @app.route('/health', methods=['GET'])
 def simple_health_check():
@@ -62,30 +117,26 @@ def health_check():
         'status': 'healthy',
         'sqs_connected': sqs_connector is not None,
         'kafka_connected': kafka_connector is not None,
-        'stream_status': metrics['stream_status']
+        'stream_status': str(metrics.status)
     })
 
 @app.route('/api/metrics', methods=['GET'])
 def get_metrics():
     """Get current metrics."""
-    return jsonify(metrics)
+    return Response(metrics.json_bytes(), mimetype='application/json')
 
 @app.route('/api/stream/start', methods=['POST'])
 def start_stream():
     """Start the streaming process."""
-    if metrics['stream_status'] == 'running':
+    if metrics.status == StreamStatus.RUNNING:
         return jsonify({'message': 'Stream is already running'}), 400
     
     try:
-        # Start the stream processor in a background thread
-        stream_thread = threading.Thread(
-            target=stream_processor.start_streaming,
-            args=(metrics,),
-            daemon=True
-        )
-        stream_thread.start()
+        # The stream processor runs its worker in its own background thread
+        if stream_processor.start_streaming(metrics) is None:
+            return jsonify({'message': 'Previous stream run is still stopping'}), 400
         
-        metrics['stream_status'] = 'running'
+        metrics.status = StreamStatus.RUNNING
         logger.info("Stream processing started")
         return jsonify({'message': 'Stream processing started successfully'})
     except Exception as e:
@@ -95,15 +146,17 @@ def start_stream():
 @app.route('/api/stream/stop', methods=['POST'])
 def stop_stream():
     """Stop the streaming process."""
-    if metrics['stream_status'] == 'stopped':
+    if metrics.status == StreamStatus.STOPPED:
         return jsonify({'message': 'Stream is already stopped'}), 400
     
     try:
         stream_processor.stop_streaming()
-        metrics['stream_status'] = 'stopped'
+        metrics.status = StreamStatus.STOPPED
         logger.info("Stream processing stopped")
         return jsonify({'message': 'Stream processing stopped successfully'})
     except Exception as e:
+        # The worker has stopped either way; report the error that ended the run
+        metrics.status = StreamStatus.STOPPED
         logger.error(f"Failed to stop stream: {e}")
         return jsonify({'error': str(e)}), 500
 
@@ -111,7 +164,8 @@ def stop_stream():
 def get_topics():
     """Get available Kafka topics."""
     try:
-        topics = stream_processor.get_available_topics()
+        with kafka_pool.connection() as kafka:
+            topics = kafka.list_topics()
         return jsonify({'topics': topics})
     except Exception as e:
         logger.error(f"Failed to get topics: {e}")
@@ -129,7 +183,8 @@ def create_topic():
         if not topic_name:
             return jsonify({'error': 'Topic name is required'}), 400
         
-        kafka_connector.create_topics([topic_name], num_partitions=partitions, replication_factor=replication)
+        with kafka_pool.connection() as kafka:
+            kafka.create_topics([topic_name], num_partitions=partitions, replication_factor=replication)
         return jsonify({'message': f'Topic {topic_name} created successfully'})
     except Exception as e:
         logger.error(f"Failed to create topic: {e}")
@@ -138,31 +193,21 @@ def create_topic():
 @app.route('/api/admin/login', methods=['POST'])
 def admin_login():
     """Admin login endpoint."""
-    from backend.src.config.config import ADMIN_USERNAME, ADMIN_PASSWORD
-    
     data = request.get_json()
-    username = data.get('username')
-    password = data.get('password')
+    username = data.get('username') or ''
+    password = data.get('password') or ''
+    
+    # Compare fixed-length digests in constant time, checking both fields
+    # so the response time doesn't reveal which one was wrong
+    username_ok = hmac.compare_digest(_credential_digest(username), _ADMIN_USERNAME_HASH)
+    password_ok = hmac.compare_digest(_credential_digest(password), _ADMIN_PASSWORD_HASH)
     
-    if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+    if username_ok & password_ok:
         return jsonify({'message': 'Login successful', 'role': 'admin'})
     else:
         return jsonify({'error': 'Invalid credentials'}), 401
 
-def start_scheduler():
-    """Start the background scheduler for periodic tasks."""
-    scheduler = BackgroundScheduler()
-    
-    # Add periodic tasks here if needed
-    # Example: scheduler.add_job(check_stream_health, 'interval', minutes=5)
-    
-    scheduler.start()
-    logger.info("Background scheduler started")
-
 if __name__ == '__main__':
-    # Start the background scheduler
-    start_scheduler()
-    
     # Start the Flask application
     logger.info(f"Starting application on {APP_HOST}:{APP_PORT}")
     app.run(host=APP_HOST, port=APP_PORT, debug=DEBUG)
@@ -14,6 +14,7 @@ AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID', '')
 AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY', '')
 SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL', '')
 SQS_SUBNET_ID = os.getenv('SQS_SUBNET_ID', '')
+SQS_MAX_POOL_CONNECTIONS = int(os.getenv('SQS_MAX_POOL_CONNECTIONS', '50'))
 
 # Kafka Configuration
 KAFKA_BOOTSTRAP_SERVERS = os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'localhost:9092')
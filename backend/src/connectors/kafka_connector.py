@@ -2,10 +2,14 @@
 Kafka Connector for sending messages to Kafka topics.
 This connector can work with Kafka clusters located on a different subnet.
 """
-import json
+import time
+import atexit
+import functools
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from typing import Dict, Any, Callable, Optional, List, Iterable, Tuple, Union
 
+import orjson
 from confluent_kafka import Producer, KafkaException, KafkaError
 from confluent_kafka.admin import AdminClient, NewTopic
 
@@ -21,6 +25,33 @@ from src.config.config import (
 
 logger = logging.getLogger(__name__)
 
+# How long the set of known topics is trusted before re-fetching metadata
+TOPIC_CACHE_TTL_SECONDS = 30
+
+# How long each producer poll in the background thread waits for events
+PRODUCER_POLL_TIMEOUT_SECONDS = 0.5
+
+@functools.lru_cache(maxsize=4096)
+def _encode_key(key: str) -> bytes:
+    """
+    Encode a message key, reusing the bytes for repeated keys.
+    
+    Partition keys are usually low-cardinality, so caching avoids
+    a UTF-8 encode per message.
+    """
+    return key.encode('utf-8')
+
+def _encode_value(message: Union[Dict[str, Any], bytes]) -> bytes:
+    """
+    Serialize a message value as JSON.
+    
+    Values that are already JSON-encoded bytes are passed through as-is,
+    so callers holding a serialized payload avoid a decode/encode round trip.
+    """
+    if type(message) is bytes:
+        return message
+    return orjson.dumps(message)
+
 class KafkaConnector:
     """
     Connector class for Kafka.
@@ -29,18 +60,35 @@ class KafkaConnector:
     to send messages to Kafka topics.
     """
     
-    def __init__(self, bootstrap_servers: Optional[str] = None, topic: Optional[str] = None):
+    def __init__(self, bootstrap_servers: Optional[str] = None, topic: Optional[str] = None,
+                 linger_ms: int = 10, producer: Optional[Producer] = None):
         """
         Initialize the Kafka connector.
         
         Args:
             bootstrap_servers: Kafka bootstrap servers. Defaults to value from config.
             topic: Default Kafka topic. Defaults to value from config.
+            linger_ms: Time the producer waits to batch messages before sending.
+                Set to 0 for lowest latency.
+            producer: Existing producer to send with, e.g. one shared with another
+                connector. Its owner polls it for delivery reports and flushes
+                it on exit. Defaults to a new producer built from this
+                connector's config, in which case linger_ms applies.
         """
         self.bootstrap_servers = bootstrap_servers or KAFKA_BOOTSTRAP_SERVERS
         self.topic = topic or KAFKA_TOPIC
-        self.producer = None
+        self.producer = producer
+        self._owns_producer = producer is None
         self.admin_client = None
+        self._poll_thread = None
+        self._poll_stop = threading.Event()
+        
+        # Topics known to exist, refreshed from cluster metadata at most once per TTL
+        self._known_topics = set()
+        self._topics_cached_at = 0.0
+        
+        # Bind the delivery callback once rather than creating a bound method per message
+        self._on_delivery = self._delivery_report
         
         # Configure Kafka connection
         self.config = {
@@ -50,6 +98,10 @@ class KafkaConnector:
             'compression.type': 'snappy',  # Enable compression
             'retries': 5,  # Retry on failure
             'retry.backoff.ms': 500,  # Backoff time between retries
+            'enable.idempotence': True,  # Keep retried batches in order without duplicates
+            'linger.ms': linger_ms,  # Coalesce bursts of messages into one request
+            'batch.num.messages': 10000,  # Max messages per batch
+            'queue.buffering.max.kbytes': 1048576,  # 1GB local producer queue
         }
         
         # Add security configuration if provided
@@ -70,16 +122,32 @@ class KafkaConnector:
         """
         try:
             logger.info(f"Connecting to Kafka at {self.bootstrap_servers}")
-            self.producer = Producer(self.config)
+            if self.producer is None:
+                self.producer = Producer(self.config)
             self.admin_client = AdminClient(self.config)
             logger.info("Connected to Kafka successfully")
             
             # Ensure the topic exists
             self.ensure_topic_exists(self.topic)
             
+            # Service delivery callbacks of our own producer in the background
+            # instead of on the send path; a shared producer is polled by its owner
+            if self._owns_producer:
+                self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+                self._poll_thread.start()
+                atexit.register(self.close)
+            
         except KafkaException as e:
             logger.error(f"Error connecting to Kafka: {e}")
             raise
+    
+    def _poll_loop(self):
+        """
+        Poll the producer for delivery reports until the connector is closed.
+        """
+        poll = self.producer.poll
+        while not self._poll_stop.is_set():
+            poll(PRODUCER_POLL_TIMEOUT_SECONDS)
             
     def ensure_topic_exists(self, topic: str, num_partitions: int = 3, replication_factor: int = 3):
         """
@@ -90,12 +158,18 @@ class KafkaConnector:
             num_partitions: Number of partitions for the topic
             replication_factor: Replication factor for the topic
         """
+        if (topic in self._known_topics and
+                time.monotonic() - self._topics_cached_at < TOPIC_CACHE_TTL_SECONDS):
+            return
+        
         try:
             # Get existing topics
             metadata = self.admin_client.list_topics(timeout=10)
+            self._known_topics = set(metadata.topics)
+            self._topics_cached_at = time.monotonic()
             
             # Check if the topic exists
-            if topic not in metadata.topics:
+            if topic not in self._known_topics:
                 logger.info(f"Topic {topic} does not exist, creating it")
                 topic_list = [NewTopic(
                     topic, 
@@ -104,7 +178,7 @@ class KafkaConnector:
                 )]
                 
                 # Create the topic
-                self.admin_client.create_topics(topic_list)
+                self._wait_for_topics(self.admin_client.create_topics(topic_list))
                 logger.info(f"Topic {topic} created successfully")
             else:
                 logger.info(f"Topic {topic} already exists")
@@ -113,6 +187,32 @@ class KafkaConnector:
             logger.warning(f"Error checking/creating topic: {e}")
             # Continue anyway, the topic might be auto-created when sending messages
     
+    def _wait_for_topics(self, futures: Dict[str, Any]):
+        """
+        Wait for topic creations and cache the topics that now exist.
+        
+        A topic is only cached once its creation succeeded, or failed
+        because the topic already exists.
+        
+        Args:
+            futures: Futures by topic name, as returned by AdminClient.create_topics
+            
+        Raises:
+            KafkaException: The error of the first topic that could not be created
+        """
+        error = None
+        for topic, future in futures.items():
+            try:
+                future.result()
+            except KafkaException as e:
+                if e.args[0].code() != KafkaError.TOPIC_ALREADY_EXISTS:
+                    error = error or e
+                    continue
+            self._known_topics.add(topic)
+        
+        if error is not None:
+            raise error
+    
     def _delivery_report(self, err, msg):
         """
         Callback for message delivery reports.
@@ -122,48 +222,84 @@ class KafkaConnector:
             msg: Message that was delivered
         """
         if err is not None:
-            logger.error(f"Message delivery failed: {err}")
-        else:
-            topic = msg.topic()
-            partition = msg.partition()
-            offset = msg.offset()
-            logger.debug(f"Message delivered to {topic}[{partition}] at offset {offset}")
+            logger.error("Message delivery failed: %s", err)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Message delivered to %s[%s] at offset %s",
+                         msg.topic(), msg.partition(), msg.offset())
             
-    def send_message(self, message: Dict[str, Any], topic: Optional[str] = None, key: Optional[str] = None) -> bool:
+    def send_message(self, message: Union[Dict[str, Any], bytes], topic: Optional[str] = None,
+                     key: Optional[str] = None, on_delivery: Optional[Callable] = None) -> bool:
         """
         Send a message to a Kafka topic.
         
+        The message is only queued in the producer; its delivery is reported
+        later, from the background poll thread or a flush.
+        
         Args:
-            message: Message as a dictionary, will be converted to JSON
+            message: Message as a dictionary, will be converted to JSON,
+                or bytes that are already JSON-encoded
             topic: Topic to send the message to. Defaults to the default topic.
             key: Optional message key for partitioning
+            on_delivery: Optional callback taking (err, msg) that is called
+                with the delivery report instead of logging it
             
         Returns:
-            True if the message was sent, False otherwise
+            True if the message was queued for delivery, False otherwise
         """
         try:
-            target_topic = topic or self.topic
-            message_json = json.dumps(message).encode('utf-8')
-            
-            # If key is provided, encode it
-            key_bytes = key.encode('utf-8') if key else None
+            if topic is None:
+                topic = self.topic
             
-            # Send the message
+            # produce() only accepts read-only bytes and copies the payload
+            # into librdkafka's queue, so the bytes are released right after.
             self.producer.produce(
-                topic=target_topic,
-                key=key_bytes,
-                value=message_json,
-                callback=self._delivery_report
+                topic=topic,
+                key=_encode_key(key) if key else None,
+                value=_encode_value(message),
+                callback=on_delivery or self._on_delivery
             )
             
-            # Trigger any available delivery callbacks
-            self.producer.poll(0)
-            
             return True
             
         except KafkaException as e:
             logger.error(f"Error sending message to Kafka: {e}")
             return False
+    
+    def send_messages(self, messages: Iterable[Tuple[Optional[str], Union[Dict[str, Any], bytes], Optional[str]]],
+                      on_delivery: Optional[Callable] = None) -> int:
+        """
+        Send a batch of messages to Kafka.
+        
+        Messages are queued back to back; delivery callbacks are serviced by
+        the background poll thread.
+        
+        Args:
+            messages: Iterable of (key, message, topic) tuples. Messages are
+                dictionaries or JSON-encoded bytes, and a topic of None uses
+                the default topic.
+            on_delivery: Optional callback taking (err, msg) that is called
+                with each delivery report instead of logging it
+            
+        Returns:
+            Number of messages queued for delivery
+        """
+        produce = self.producer.produce
+        on_delivery = on_delivery or self._on_delivery
+        sent = 0
+        
+        try:
+            for key, message, topic in messages:
+                produce(
+                    topic=self.topic if topic is None else topic,
+                    key=_encode_key(key) if key else None,
+                    value=_encode_value(message),
+                    callback=on_delivery
+                )
+                sent += 1
+        except KafkaException as e:
+            logger.error(f"Error sending message batch to Kafka: {e}")
+        
+        return sent
             
     def flush(self, timeout: int = 10):
         """
@@ -174,6 +310,24 @@ class KafkaConnector:
         """
         self.producer.flush(timeout)
     
+    def close(self, timeout: int = 10):
+        """
+        Stop the background poll thread and deliver any queued messages.
+        
+        Does nothing for a connector sending with a producer it was given.
+        
+        Args:
+            timeout: Maximum time to wait for delivery in seconds
+        """
+        if self._poll_thread is None:
+            return
+        
+        self._poll_stop.set()
+        self._poll_thread.join()
+        self._poll_thread = None
+        atexit.unregister(self.close)
+        self.producer.flush(timeout)
+    
     def create_topics(self, topics: List[str], num_partitions: int = 3, replication_factor: int = 3):
         """
         Create multiple Kafka topics.
@@ -193,9 +347,23 @@ class KafkaConnector:
                 for topic in topics
             ]
             
-            self.admin_client.create_topics(topic_list)
+            self._wait_for_topics(self.admin_client.create_topics(topic_list))
             logger.info(f"Created topics: {', '.join(topics)}")
             
         except KafkaException as e:
             logger.error(f"Error creating topics: {e}")
             raise
+    
+    def list_topics(self) -> List[str]:
+        """
+        Get the names of the topics in the cluster.
+        
+        Returns:
+            List of topic names, or only the default topic if listing fails
+        """
+        try:
+            metadata = self.admin_client.list_topics(timeout=10)
+            return list(metadata.topics.keys())
+        except KafkaException as e:
+            logger.error(f"Error getting topics: {e}")
+            return [self.topic]  # Return default topic if listing fails
@@ -2,12 +2,17 @@
 AWS SQS Connector for retrieving messages from an SQS queue.
 This connector can work with queues located on a different subnet.
 """
-import json
 import time
+import queue
 import logging
-from typing import Dict, List, Any, Optional
+import functools
+import threading
+from operator import itemgetter
+from typing import Dict, List, Any, Optional, Tuple
 
 import boto3
+import orjson
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from src.config.config import (
@@ -16,11 +21,42 @@ from src.config.config import (
     AWS_SECRET_ACCESS_KEY,
     SQS_QUEUE_URL,
     SQS_SUBNET_ID,
+    SQS_MAX_POOL_CONNECTIONS,
     VPC_ID
 )
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of entries accepted by the SQS batch APIs
+SQS_MAX_BATCH_SIZE = 10
+
+# First characters, after leading whitespace, of message bodies that are parsed as JSON
+_JSON_START_CHARS = ('{', '[')
+
+# Extracts the required fields of a raw SQS message in one call
+_get_message_fields = itemgetter('Body', 'MessageId', 'ReceiptHandle')
+
+@functools.lru_cache(maxsize=None)
+def _get_ec2_client(region: str):
+    """
+    Get an EC2 client for the region, shared across connector instances.
+    
+    Client construction loads the botocore service model, so it is only
+    done once per region.
+    
+    Args:
+        region: AWS region
+        
+    Returns:
+        boto3 EC2 client
+    """
+    return boto3.client(
+        'ec2',
+        region_name=region,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    )
+
 class SQSConnector:
     """
     Connector class for AWS SQS.
@@ -29,6 +65,11 @@ class SQSConnector:
     to retrieve, process and delete messages from the queue.
     """
     
+    # (VPC ID, subnet ID, region) combinations whose SQS endpoint has been
+    # checked in this process, shared by all connector instances
+    _vpc_endpoint_ensured: Dict[Tuple[str, str, str], bool] = {}
+    _vpc_endpoint_lock = threading.Lock()
+    
     def __init__(self, queue_url: Optional[str] = None, region: Optional[str] = None):
         """
         Initialize the SQS connector.
@@ -40,17 +81,27 @@ class SQSConnector:
         self.queue_url = queue_url or SQS_QUEUE_URL
         self.region = region or AWS_REGION
         
+        # Keep a pool of keep-alive connections large enough for the streaming
+        # pipeline and API handlers, and back off adaptively on throttling
+        boto_config = Config(
+            region_name=self.region,
+            max_pool_connections=SQS_MAX_POOL_CONNECTIONS,
+            retries={'mode': 'adaptive', 'max_attempts': 10},
+            tcp_keepalive=True
+        )
+        
         # Check if credentials are provided
         if not AWS_ACCESS_KEY_ID or not AWS_SECRET_ACCESS_KEY:
             logger.info("Using AWS IAM role for authentication")
-            self.sqs = boto3.client('sqs', region_name=self.region)
+            self.sqs = boto3.client('sqs', region_name=self.region, config=boto_config)
         else:
             logger.info("Using AWS access key for authentication")
             self.sqs = boto3.client(
                 'sqs', 
                 region_name=self.region,
                 aws_access_key_id=AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                config=boto_config
             )
         
         # For cross-subnet communication, we need to use VPC endpoints
@@ -62,45 +113,52 @@ class SQSConnector:
         """
         Set up a VPC endpoint for SQS to allow cross-subnet communication.
         This is needed when the SQS queue is in a different subnet.
+        The check runs once per VPC, subnet and region for the process.
         """
-        try:
-            ec2 = boto3.client(
-                'ec2',
-                region_name=self.region,
-                aws_access_key_id=AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-            )
-            
-            # Create a VPC endpoint for SQS if it doesn't exist
-            response = ec2.describe_vpc_endpoints(
-                Filters=[
-                    {
-                        'Name': 'vpc-id',
-                        'Values': [VPC_ID]
-                    },
-                    {
-                        'Name': 'service-name',
-                        'Values': [f'com.amazonaws.{self.region}.sqs']
-                    }
-                ]
-            )
+        key = (VPC_ID, SQS_SUBNET_ID, self.region)
+        if key in SQSConnector._vpc_endpoint_ensured:
+            return
+        
+        # Held across the EC2 calls so concurrent connectors don't both create the endpoint
+        with SQSConnector._vpc_endpoint_lock:
+            if key in SQSConnector._vpc_endpoint_ensured:
+                return
             
-            if not response['VpcEndpoints']:
-                logger.info(f"Creating VPC endpoint for SQS in VPC {VPC_ID}")
-                ec2.create_vpc_endpoint(
-                    VpcId=VPC_ID,
-                    ServiceName=f'com.amazonaws.{self.region}.sqs',
-                    SubnetIds=[SQS_SUBNET_ID],
-                    VpcEndpointType='Interface',
-                    PrivateDnsEnabled=True
+            try:
+                ec2 = _get_ec2_client(self.region)
+                
+                # Create a VPC endpoint for SQS if it doesn't exist
+                response = ec2.describe_vpc_endpoints(
+                    Filters=[
+                        {
+                            'Name': 'vpc-id',
+                            'Values': [VPC_ID]
+                        },
+                        {
+                            'Name': 'service-name',
+                            'Values': [f'com.amazonaws.{self.region}.sqs']
+                        }
+                    ]
                 )
-                logger.info("VPC endpoint created successfully")
-            else:
-                logger.info("VPC endpoint for SQS already exists")
                 
-        except ClientError as e:
-            logger.error(f"Error setting up VPC endpoint: {e}")
-            raise
+                if not response['VpcEndpoints']:
+                    logger.info(f"Creating VPC endpoint for SQS in VPC {VPC_ID}")
+                    ec2.create_vpc_endpoint(
+                        VpcId=VPC_ID,
+                        ServiceName=f'com.amazonaws.{self.region}.sqs',
+                        SubnetIds=[SQS_SUBNET_ID],
+                        VpcEndpointType='Interface',
+                        PrivateDnsEnabled=True
+                    )
+                    logger.info("VPC endpoint created successfully")
+                else:
+                    logger.info("VPC endpoint for SQS already exists")
+                
+                SQSConnector._vpc_endpoint_ensured[key] = True
+                    
+            except ClientError as e:
+                logger.error(f"Error setting up VPC endpoint: {e}")
+                raise
 
     def receive_messages(self, max_messages: int = 10, wait_time: int = 20) -> List[Dict[str, Any]]:
         """
@@ -123,28 +181,35 @@ class SQSConnector:
             )
             
             messages = response.get('Messages', [])
-            logger.info(f"Received {len(messages)} messages from SQS")
+            logger.info("Received %d messages from SQS", len(messages))
             
             # Process messages and extract the body
             processed_messages = []
+            append = processed_messages.append
+            loads = orjson.loads
+            
             for message in messages:
                 try:
-                    # Parse the message body as JSON if possible
-                    body = message['Body']
-                    message_id = message['MessageId']
-                    receipt_handle = message['ReceiptHandle']
+                    body, message_id, receipt_handle = _get_message_fields(message)
                     
-                    try:
-                        body_json = json.loads(body)
-                    except json.JSONDecodeError:
+                    # Parse the message body as JSON if it looks like an object or array,
+                    # skipping the parse attempt for bodies that are plainly not JSON
+                    body_json = None
+                    if body.lstrip()[:1] in _JSON_START_CHARS:
+                        try:
+                            body_json = loads(body)
+                        except orjson.JSONDecodeError:
+                            pass
+                    
+                    if body_json is None:
                         body_json = {"raw_message": body}
                     
-                    processed_messages.append({
+                    append({
                         'message_id': message_id,
                         'receipt_handle': receipt_handle,
                         'body': body_json,
-                        'attributes': message.get('Attributes', {}),
-                        'message_attributes': message.get('MessageAttributes', {})
+                        'attributes': message.get('Attributes') or {},
+                        'message_attributes': message.get('MessageAttributes') or {}
                     })
                 except Exception as e:
                     logger.error(f"Error processing message: {e}")
@@ -170,12 +235,46 @@ class SQSConnector:
                 QueueUrl=self.queue_url,
                 ReceiptHandle=receipt_handle
             )
-            logger.debug(f"Deleted message with receipt handle {receipt_handle[:10]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Deleted message with receipt handle %s...", receipt_handle[:10])
             return True
         except ClientError as e:
             logger.error(f"Error deleting message: {e}")
             return False
     
+    def delete_messages(self, receipt_handles: List[str]) -> List[bool]:
+        """
+        Delete multiple messages from the queue after processing.
+        
+        Uses DeleteMessageBatch, issuing one call per 10 receipt handles.
+        
+        Args:
+            receipt_handles: The receipt handles of the messages to delete
+            
+        Returns:
+            List with True for each message that was deleted, False otherwise
+        """
+        results = [False] * len(receipt_handles)
+        
+        for start in range(0, len(receipt_handles), SQS_MAX_BATCH_SIZE):
+            batch = receipt_handles[start:start + SQS_MAX_BATCH_SIZE]
+            try:
+                response = self.sqs.delete_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {'Id': str(start + i), 'ReceiptHandle': handle}
+                        for i, handle in enumerate(batch)
+                    ]
+                )
+                for entry in response.get('Successful', []):
+                    results[int(entry['Id'])] = True
+                for entry in response.get('Failed', []):
+                    logger.error(f"Error deleting message: {entry.get('Message')}")
+            except ClientError as e:
+                logger.error(f"Error deleting messages: {e}")
+        
+        return results
+    
     def send_message(self, message_body: Dict[str, Any]) -> Optional[str]:
         """
         Send a message to the SQS queue.
@@ -189,41 +288,111 @@ class SQSConnector:
         try:
             response = self.sqs.send_message(
                 QueueUrl=self.queue_url,
-                MessageBody=json.dumps(message_body)
+                MessageBody=orjson.dumps(message_body).decode('utf-8')
             )
             message_id = response['MessageId']
-            logger.info(f"Sent message to SQS with ID {message_id}")
+            logger.info("Sent message to SQS with ID %s", message_id)
             return message_id
         except ClientError as e:
             logger.error(f"Error sending message: {e}")
             return None
     
-    def stream_messages(self, handler_func, poll_interval: int = 5, max_messages: int = 10):
+    def _prefetch_messages(self, batches: queue.Queue, poll_interval: int, max_messages: int,
+                           max_poll_interval: int):
+        """
+        Continuously receive message batches and queue them for processing.
+        
+        Blocks while the queue is full, so at most a bounded number of
+        batches are held in memory ahead of the handler. While the queue
+        keeps returning messages it is polled again immediately; after empty
+        polls the wait doubles up to max_poll_interval.
+        
+        Args:
+            batches: Queue to put received message batches on
+            poll_interval: Initial time to wait after an empty poll in seconds
+            max_messages: Maximum number of messages to retrieve per poll
+            max_poll_interval: Maximum time to wait after an empty poll in seconds
+        """
+        sleep_time = poll_interval
+        
+        while True:
+            try:
+                messages = self.receive_messages(max_messages=max_messages)
+                
+                if messages:
+                    batches.put(messages)
+                    sleep_time = poll_interval
+                    continue
+                
+            except Exception as e:
+                logger.error(f"Error in message prefetch loop: {e}")
+            
+            # Nothing received, back off before polling again
+            time.sleep(sleep_time)
+            sleep_time = min(sleep_time * 2, max_poll_interval)
+    
+    def _delete_processed(self, deletions: queue.Queue):
+        """
+        Continuously delete batches of processed messages from the queue.
+        
+        Args:
+            deletions: Queue of receipt handle lists to delete
+        """
+        while True:
+            receipt_handles = deletions.get()
+            try:
+                self.delete_messages(receipt_handles)
+            except Exception as e:
+                logger.error(f"Error in message deletion loop: {e}")
+    
+    def stream_messages(self, handler_func, poll_interval: int = 5, max_messages: int = 10,
+                        prefetch_batches: int = 2, max_poll_interval: int = 60):
         """
         Stream messages continuously from the queue and process them with a handler function.
         
+        Receiving, handling and deleting run as a pipeline: the next batch is
+        long-polled and the previous batch deleted while the current batch is
+        being handled.
+        
         Args:
             handler_func: Function that will process each message
-            poll_interval: Time to wait between polling attempts in seconds
+            poll_interval: Initial time to wait after an empty poll in seconds
             max_messages: Maximum number of messages to retrieve per poll
+            prefetch_batches: Maximum number of received batches waiting to be handled
+            max_poll_interval: Maximum time to wait after repeated empty polls in seconds
         """
         logger.info(f"Starting SQS message streaming from {self.queue_url}")
+        batches = queue.Queue(maxsize=prefetch_batches)
+        deletions = queue.Queue()
+        
+        # Start the receive and delete stages in separate threads
+        threading.Thread(
+            target=self._prefetch_messages,
+            args=(batches, poll_interval, max_messages, max_poll_interval),
+            daemon=True
+        ).start()
+        threading.Thread(
+            target=self._delete_processed,
+            args=(deletions,),
+            daemon=True
+        ).start()
+        
         while True:
+            messages = batches.get()
             try:
-                messages = self.receive_messages(max_messages=max_messages)
-                
+                # Process the messages with the handler function, keeping the
+                # receipt handles of those that were processed successfully
+                receipt_handles = []
                 for message in messages:
-                    # Process the message with the handler function
-                    result = handler_func(message)
-                    
-                    # If processing was successful, delete the message from the queue
-                    if result:
-                        self.delete_message(message['receipt_handle'])
+                    try:
+                        if handler_func(message):
+                            receipt_handles.append(message['receipt_handle'])
+                    except Exception as e:
+                        logger.error(f"Error handling message {message.get('message_id')}: {e}")
                 
-                # If no messages were received, wait before polling again
-                if not messages:
-                    time.sleep(poll_interval)
+                # Hand the successfully processed messages to the delete worker
+                if receipt_handles:
+                    deletions.put(receipt_handles)
                     
             except Exception as e:
                 logger.error(f"Error in message streaming loop: {e}")
-                time.sleep(poll_interval)  # Wait before retrying
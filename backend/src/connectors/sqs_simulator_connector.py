@@ -2,13 +2,12 @@
 SQS Simulator Connector using Kafka as a backend.
 This connector simulates AWS SQS functionality using Kafka topics.
 """
-import json
 import time
 import logging
 import uuid
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, Iterable, List, Any, Optional
 
+import orjson
 from confluent_kafka import Consumer, Producer, KafkaError, KafkaException
 from confluent_kafka.admin import AdminClient, NewTopic
 
@@ -22,6 +21,12 @@ from src.config.config import (
 
 logger = logging.getLogger(__name__)
 
+# Number of sends between producer polls for delivery callbacks
+SEND_POLL_INTERVAL = 100
+
+# Kafka header carrying the simulated SQS message ID
+MESSAGE_ID_HEADER = 'message_id'
+
 class SQSSimulatorConnector:
     """
     Simulator connector class for AWS SQS using Kafka.
@@ -30,15 +35,19 @@ class SQSSimulatorConnector:
     providing the same interface as the SQSConnector class.
     """
     
-    def __init__(self, queue_name: str = "sqs-queue-1", bootstrap_servers: Optional[str] = None):
+    def __init__(self, queue_name: str = "sqs-queue-1", bootstrap_servers: Optional[str] = None,
+                 producer: Optional[Producer] = None):
         """
         Initialize the SQS simulator connector.
         
         Args:
             queue_name: Name of the simulated SQS queue (Kafka topic)
             bootstrap_servers: Kafka bootstrap servers. Defaults to value from config.
+            producer: Existing producer to send with, e.g. one shared with another
+                connector. Defaults to a new producer built from this connector's config.
         """
         self.queue_name = queue_name
+        self.producer = producer
         self.bootstrap_servers = bootstrap_servers or KAFKA_BOOTSTRAP_SERVERS
         self.consumer_group = f"sqs-simulator-{uuid.uuid4().hex[:8]}"
         
@@ -58,13 +67,30 @@ class SQSSimulatorConnector:
             self.config['sasl.username'] = KAFKA_SASL_USERNAME
             self.config['sasl.password'] = KAFKA_SASL_PASSWORD
             
+        # Producer config, batching and compressing bursts of sends
+        self.producer_config = self.config.copy()
+        self.producer_config.update({
+            'compression.type': 'lz4',
+            'linger.ms': 5,
+            'batch.num.messages': 10000,
+            'queue.buffering.max.kbytes': 1048576,  # 1GB local producer queue
+        })
+        self._sends_since_poll = 0
+        
         # Consumer config
         self.consumer_config = self.config.copy()
         self.consumer_config.update({
             'group.id': self.consumer_group,
             'auto.offset.reset': 'earliest',
-            'enable.auto.commit': False,
+            # Offsets are stored explicitly for each received message and
+            # committed by librdkafka in the background and on close
+            'enable.auto.commit': True,
+            'enable.auto.offset.store': False,
             'session.timeout.ms': 10000,
+            'fetch.min.bytes': 65536,
+            'fetch.wait.max.ms': 500,
+            'fetch.message.max.bytes': 5 * 1024 * 1024,  # 5MB per partition per fetch
+            'queued.max.messages.kbytes': 1048576,  # 1GB local prefetch queue
         })
         
         # Connect to Kafka
@@ -76,13 +102,18 @@ class SQSSimulatorConnector:
         """
         try:
             logger.info(f"Connecting to Kafka at {self.bootstrap_servers}")
-            self.producer = Producer(self.config)
+            if self.producer is None:
+                self.producer = Producer(self.producer_config)
             self.admin_client = AdminClient(self.config)
             logger.info("Connected to Kafka successfully")
             
             # Ensure the queue topic exists
             self.ensure_queue_exists(self.queue_name)
             
+            # Join the consumer group once; receive_messages reuses this consumer
+            self.consumer = Consumer(self.consumer_config)
+            self.consumer.subscribe([self.queue_name])
+            
         except KafkaException as e:
             logger.error(f"Error connecting to Kafka: {e}")
             raise
@@ -126,12 +157,10 @@ class SQSSimulatorConnector:
             msg: Message that was delivered
         """
         if err is not None:
-            logger.error(f"Message delivery failed: {err}")
-        else:
-            topic = msg.topic()
-            partition = msg.partition()
-            offset = msg.offset()
-            logger.debug(f"Message delivered to {topic}[{partition}] at offset {offset}")
+            logger.error("Message delivery failed: %s", err)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Message delivered to %s[%s] at offset %s",
+                         msg.topic(), msg.partition(), msg.offset())
 
     def receive_messages(self, max_messages: int = 10, wait_time: int = 20) -> List[Dict[str, Any]]:
         """
@@ -145,46 +174,53 @@ class SQSSimulatorConnector:
             List of messages, each as a dictionary
         """
         try:
-            # Create a consumer instance for this poll
-            consumer = Consumer(self.consumer_config)
-            consumer.subscribe([self.queue_name])
-            
+            consumer = self.consumer
             messages = []
-            start_time = time.time()
-            end_time = start_time + wait_time
             
-            while len(messages) < max_messages and time.time() < end_time:
-                # Poll for messages
-                msg = consumer.poll(timeout=1.0)
-                
-                if msg is None:
-                    continue
-                
+            # Fetch up to max_messages in one call, waiting at most wait_time
+            msgs = consumer.consume(num_messages=max_messages, timeout=wait_time)
+            
+            # Messages of a batch are received together, so they share one
+            # timestamp; each message gets its own copy of the attributes
+            timestamp_ms = str(int(time.time() * 1000))
+            attributes = {
+                'SentTimestamp': timestamp_ms,
+                'ApproximateReceiveCount': '1',
+                'ApproximateFirstReceiveTimestamp': timestamp_ms
+            }
+            
+            for msg in msgs:
                 if msg.error():
                     if msg.error().code() == KafkaError._PARTITION_EOF:
                         logger.debug("Reached end of partition")
                     else:
-                        logger.error(f"Error polling for messages: {msg.error()}")
+                        logger.error("Error polling for messages: %s", msg.error())
                     continue
                 
                 try:
-                    # Parse the message value
-                    value_str = msg.value().decode('utf-8')
-                    value_dict = json.loads(value_str)
+                    # Parse the message value, orjson reads the bytes directly
+                    value = orjson.loads(msg.value())
                     
-                    # Generate a unique receipt handle (needed for SQS interface)
-                    receipt_handle = f"{msg.topic()}-{msg.partition()}-{msg.offset()}-{uuid.uuid4().hex}"
+                    headers = msg.headers()
+                    if headers and headers[0][0] == MESSAGE_ID_HEADER:
+                        # The message ID travels as a header and the value is the body
+                        message_id = headers[0][1].decode('utf-8')
+                        body = value
+                    else:
+                        # Messages with a JSON envelope, or produced by other clients
+                        message_id = value.get('message_id', str(uuid.uuid4()))
+                        body = value.get('body', value)
+                    
+                    # Build the receipt handle (needed for SQS interface); the
+                    # topic, partition and offset already identify the message
+                    receipt_handle = f"{msg.topic()}-{msg.partition()}-{msg.offset()}"
                     
                     # Add SQS-like metadata
                     message = {
-                        'message_id': value_dict.get('message_id', str(uuid.uuid4())),
+                        'message_id': message_id,
                         'receipt_handle': receipt_handle,
-                        'body': value_dict.get('body', value_dict),
-                        'attributes': {
-                            'SentTimestamp': str(int(time.time() * 1000)),
-                            'ApproximateReceiveCount': '1',
-                            'ApproximateFirstReceiveTimestamp': str(int(time.time() * 1000))
-                        },
+                        'body': body,
+                        'attributes': dict(attributes),
                         'message_attributes': {},
                         '_kafka_offset': msg.offset(),
                         '_kafka_partition': msg.partition()
@@ -198,10 +234,7 @@ class SQSSimulatorConnector:
                 except Exception as e:
                     logger.error(f"Error processing received message: {e}")
             
-            # Close the consumer
-            consumer.close()
-            
-            logger.info(f"Received {len(messages)} messages from SQS simulator")
+            logger.info("Received %d messages from SQS simulator", len(messages))
             return messages
             
         except Exception as e:
@@ -221,41 +254,36 @@ class SQSSimulatorConnector:
             True if successful, False otherwise
         """
         try:
-            # Parse the receipt handle to get topic, partition, offset
-            # Format: {queue_name}-{partition}-{offset}-{uuid}
-            # We need to be careful as queue_name might contain hyphens
-            
-            # First extract the last part (uuid)
-            last_hyphen_index = receipt_handle.rfind('-')
-            if last_hyphen_index < 0:
-                raise ValueError(f"Invalid receipt handle format: {receipt_handle}")
-                
-            # Extract the remaining parts without the uuid
-            handle_without_uuid = receipt_handle[:last_hyphen_index]
-            
-            # Now find the last two hyphens in the remaining string
-            offset_hyphen_index = handle_without_uuid.rfind('-')
-            if offset_hyphen_index < 0:
+            # In Kafka, "deleting" a message is done by committing the offset.
+            # The offset was already stored when the message was received, so
+            # the handle ({queue_name}-{partition}-{offset}) is only checked
+            # for its shape rather than split into its parts.
+            if receipt_handle.count('-') < 2:
                 raise ValueError(f"Invalid receipt handle format: {receipt_handle}")
-                
-            partition_hyphen_index = handle_without_uuid.rfind('-', 0, offset_hyphen_index)
-            if partition_hyphen_index < 0:
-                raise ValueError(f"Invalid receipt handle format: {receipt_handle}")
-            
-            # Extract the parts
-            topic = handle_without_uuid[:partition_hyphen_index]
-            partition = int(handle_without_uuid[partition_hyphen_index+1:offset_hyphen_index])
-            offset = int(handle_without_uuid[offset_hyphen_index+1:])
             
-            # In Kafka, "deleting" a message is done by committing the offset
-            # We've already stored the offset when receiving, so no additional action is needed
-            logger.debug(f"Simulated deletion of message with receipt handle {receipt_handle[:10]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Simulated deletion of message with receipt handle %s...", receipt_handle[:10])
             return True
                 
         except Exception as e:
             logger.error(f"Error deleting message: {e}")
             return False
     
+    def delete_messages(self, receipt_handles: List[str]) -> List[bool]:
+        """
+        Delete multiple messages from the simulated queue after processing.
+        
+        Mirrors SQSConnector.delete_messages; the offsets were already stored
+        on receipt, so each handle is only validated.
+        
+        Args:
+            receipt_handles: The receipt handles of the messages to delete
+            
+        Returns:
+            List with True for each message that was deleted, False otherwise
+        """
+        return [self.delete_message(receipt_handle) for receipt_handle in receipt_handles]
+    
     def send_message(self, message_body: Dict[str, Any]) -> Optional[str]:
         """
         Send a message to the simulated SQS queue.
@@ -270,47 +298,91 @@ class SQSSimulatorConnector:
             # Generate a unique message ID
             message_id = str(uuid.uuid4())
             
-            # Prepare the message with SQS-like metadata
-            message = {
-                'message_id': message_id,
-                'body': message_body,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Convert to JSON and encode
-            message_json = json.dumps(message).encode('utf-8')
-            
-            # Send the message
+            # Send the body as the value and the SQS-like metadata as a header,
+            # so receivers don't parse an envelope around the body
             self.producer.produce(
                 topic=self.queue_name,
-                value=message_json,
+                value=orjson.dumps(message_body),
+                headers=[(MESSAGE_ID_HEADER, message_id)],
                 callback=self._delivery_report
             )
             
-            # Trigger any available delivery callbacks
-            self.producer.poll(0)
+            # Service delivery callbacks every SEND_POLL_INTERVAL sends
+            self._sends_since_poll += 1
+            if self._sends_since_poll >= SEND_POLL_INTERVAL:
+                self.producer.poll(0)
+                self._sends_since_poll = 0
             
-            logger.info(f"Sent message to SQS simulator with ID {message_id}")
+            logger.debug("Sent message to SQS simulator with ID %s", message_id)
             return message_id
             
         except Exception as e:
             logger.error(f"Error sending message: {e}")
             return None
-    
-    def stream_messages(self, handler_func, poll_interval: int = 5, max_messages: int = 10):
+
+    def send_messages(self, message_bodies: Iterable[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        Send a batch of messages to the simulated SQS queue.
+
+        Messages are queued back to back and delivery callbacks are serviced
+        once for the whole batch, leaving librdkafka to group them into
+        produce requests.
+
+        Args:
+            message_bodies: Message bodies as dictionaries, will be converted to JSON
+
+        Returns:
+            List with the message ID of each message if it was sent, None otherwise
+        """
+        produce = self.producer.produce
+        on_delivery = self._delivery_report
+        message_ids = []
+
+        for message_body in message_bodies:
+            message_id = str(uuid.uuid4())
+            try:
+                produce(
+                    topic=self.queue_name,
+                    value=orjson.dumps(message_body),
+                    headers=[(MESSAGE_ID_HEADER, message_id)],
+                    callback=on_delivery
+                )
+            except Exception as e:
+                logger.error(f"Error sending message: {e}")
+                message_id = None
+            message_ids.append(message_id)
+
+        self.producer.poll(0)
+        self._sends_since_poll = 0
+
+        logger.info("Sent %d messages to SQS simulator", len(message_ids))
+        return message_ids
+
+    def stream_messages(self, handler_func, poll_interval: float = 1, max_messages: int = 10):
         """
         Stream messages continuously from the queue and process them with a handler function.
         
         Args:
             handler_func: Function that will process each message
-            poll_interval: Time to wait between polling attempts in seconds
+            poll_interval: Maximum time each receive waits for messages in seconds.
+                Kept close to the consumer's fetch.wait.max.ms.
             max_messages: Maximum number of messages to retrieve per poll
         """
         logger.info(f"Starting SQS simulator message streaming from {self.queue_name}")
         
         while True:
             try:
-                messages = self.receive_messages(max_messages=max_messages)
+                # Blocks in librdkafka until messages arrive or poll_interval elapses,
+                # so an empty receive needs no extra sleep
+                started = time.monotonic()
+                messages = self.receive_messages(max_messages=max_messages, wait_time=poll_interval)
+                
+                # An empty receive that returned early hit an error; wait out
+                # the rest of the interval instead of retrying in a tight loop
+                if not messages:
+                    remaining = poll_interval - (time.monotonic() - started)
+                    if remaining > 0:
+                        time.sleep(remaining)
                 
                 for message in messages:
                     # Process the message with the handler function
@@ -319,15 +391,23 @@ class SQSSimulatorConnector:
                     # If processing was successful, delete the message from the queue
                     if result:
                         self.delete_message(message['receipt_handle'])
-                
-                # If no messages were received, wait before polling again
-                if not messages:
-                    time.sleep(poll_interval)
                     
             except Exception as e:
                 logger.error(f"Error in message streaming loop: {e}")
                 time.sleep(poll_interval)  # Wait before retrying
     
+    def close(self, timeout: int = 10):
+        """
+        Deliver any messages still queued in the producer and close the consumer,
+        committing the offsets of received messages.
+        
+        Args:
+            timeout: Maximum time to wait for delivery in seconds
+        """
+        self.producer.flush(timeout)
+        self._sends_since_poll = 0
+        self.consumer.close()
+    
     def get_queue_url(self) -> str:
         """
         Get the URL of the simulated SQS queue.
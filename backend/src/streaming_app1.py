@@ -4,15 +4,17 @@ Streaming Application 1: Data Analytics Processor
 This application consumes data from Kafka and processes it for analytics purposes.
 It demonstrates how the same data stream can be used by different applications.
 """
-import json
 import logging
 import time
 import threading
 import signal
 import sys
+import queue
+from collections import defaultdict, deque
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+import orjson
 from confluent_kafka import Consumer, KafkaError, KafkaException
 
 from backend.src.config.config import (
@@ -31,6 +33,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger('streaming_app1')
 
+# Maximum number of messages fetched from Kafka per consume() call
+CONSUME_BATCH_SIZE = 500
+
+# Maximum number of consumed batches waiting for the analytics worker,
+# bounding the backlog to about 10000 messages
+WORK_QUEUE_SIZE = 10000 // CONSUME_BATCH_SIZE
+
+# Only records containing this key carry analytics data worth parsing
+_DATA_KEY = b'"data"'
+
+# Stand-in for records counted without being parsed, never mutated
+_NO_DATA: Dict[str, Any] = {}
+
 class AnalyticsProcessor:
     """
     Analytics processor that consumes data from Kafka for analytics purposes.
@@ -38,7 +53,9 @@ class AnalyticsProcessor:
     
     def __init__(self, bootstrap_servers: Optional[str] = None, 
                  topic: Optional[str] = None, 
-                 group_id: str = 'analytics-processor'):
+                 group_id: str = 'analytics-processor',
+                 fetch_min_bytes: int = 65536,
+                 fetch_wait_max_ms: int = 500):
         """
         Initialize the analytics processor.
         
@@ -46,14 +63,25 @@ class AnalyticsProcessor:
             bootstrap_servers: Kafka bootstrap servers
             topic: Kafka topic to consume from
             group_id: Consumer group ID
+            fetch_min_bytes: Minimum data the broker accumulates before answering a fetch.
+                Lower it for latency-sensitive deployments.
+            fetch_wait_max_ms: Maximum time the broker waits to reach fetch_min_bytes
         """
         self.bootstrap_servers = bootstrap_servers or KAFKA_BOOTSTRAP_SERVERS
         self.topic = topic or KAFKA_TOPIC
         self.group_id = group_id
+        self.fetch_min_bytes = fetch_min_bytes
+        self.fetch_wait_max_ms = fetch_wait_max_ms
         self.consumer = None
         self.running = False
         self.stop_event = threading.Event()
         
+        # Message batches handed from the consumer thread to the analytics worker thread
+        self.work_queue = queue.Queue(maxsize=WORK_QUEUE_SIZE)
+        
+        # Time of the last processed message, kept raw for the hot path
+        self._last_message_ts: Optional[float] = None
+        
         # Metrics for monitoring
         self.metrics = {
             'messages_processed': 0,
@@ -64,11 +92,15 @@ class AnalyticsProcessor:
         
         # Analytics data store (in a real application, this would be a database)
         self.analytics_data = {
-            'event_counts': {},
-            'message_sizes': [],
-            'processing_times': []
+            'event_counts': defaultdict(int),
+            'message_sizes': deque(maxlen=1000),  # Last 1000 message sizes
+            'processing_times': deque(maxlen=1000)  # Last 1000 processing times
         }
         
+        # Direct references to the aggregates updated for every message
+        self._event_counts = self.analytics_data['event_counts']
+        self._message_sizes = self.analytics_data['message_sizes']
+        
         # Set up signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -90,9 +122,16 @@ class AnalyticsProcessor:
             'bootstrap.servers': self.bootstrap_servers,
             'group.id': self.group_id,
             'auto.offset.reset': 'earliest',
-            'enable.auto.commit': False,
+            # Offsets are stored by the analytics worker once a message is
+            # processed and committed by librdkafka in the background
+            'enable.auto.commit': True,
+            'enable.auto.offset.store': False,
             'max.poll.interval.ms': 300000,  # 5 minutes
             'session.timeout.ms': 30000,  # 30 seconds
+            'fetch.min.bytes': self.fetch_min_bytes,
+            'fetch.wait.max.ms': self.fetch_wait_max_ms,
+            'fetch.message.max.bytes': 5 * 1024 * 1024,  # 5MB per partition per fetch
+            'queued.max.messages.kbytes': 1048576,  # 1GB local prefetch queue
         }
         
         # Add security configuration if provided
@@ -113,40 +152,34 @@ class AnalyticsProcessor:
             logger.error(f"Error connecting to Kafka: {e}")
             raise
     
-    def process_message(self, message: Dict[str, Any]):
+    def process_message(self, message: Dict[str, Any], raw_len: Optional[int] = None):
         """
         Process a message for analytics.
         
         Args:
             message: Message from Kafka
+            raw_len: Size of the encoded message in bytes, if known.
+                Otherwise the message is re-serialized to measure it.
         """
         try:
             # Extract data for analytics
             if 'data' in message:
                 # Track event counts by type (if available)
-                event_type = message.get('data', {}).get('type', 'unknown')
-                self.analytics_data['event_counts'][event_type] = \
-                    self.analytics_data['event_counts'].get(event_type, 0) + 1
+                event_type = message['data'].get('type', 'unknown')
+                self._event_counts[event_type] += 1
                 
                 # Track message size
-                message_size = len(json.dumps(message))
-                self.analytics_data['message_sizes'].append(message_size)
-                
-                # Keep only the last 1000 message sizes
-                if len(self.analytics_data['message_sizes']) > 1000:
-                    self.analytics_data['message_sizes'] = self.analytics_data['message_sizes'][-1000:]
-                
-                # Example analytics: calculate average size
-                avg_size = sum(self.analytics_data['message_sizes']) / len(self.analytics_data['message_sizes'])
-                logger.debug(f"Average message size: {avg_size:.2f} bytes")
+                message_size = raw_len if raw_len is not None else len(orjson.dumps(message))
+                self._message_sizes.append(message_size)
+                logger.debug("Message size: %d bytes", message_size)
                 
                 # Example analytics: log event counts periodically
-                if self.metrics['messages_processed'] % 100 == 0:
-                    logger.info(f"Event counts: {self.analytics_data['event_counts']}")
+                if self.metrics['messages_processed'] % 100 == 0 and logger.isEnabledFor(logging.INFO):
+                    logger.info("Event counts: %s", dict(self._event_counts))
                 
-            # Update metrics
+            # Update metrics, the timestamp is formatted in get_metrics()
             self.metrics['messages_processed'] += 1
-            self.metrics['last_message_time'] = datetime.now().isoformat()
+            self._last_message_ts = time.time()
             
         except Exception as e:
             logger.error(f"Error processing message for analytics: {e}")
@@ -154,7 +187,13 @@ class AnalyticsProcessor:
     
     def consume_messages(self):
         """
-        Continuously consume messages from Kafka and process them.
+        Continuously consume messages from Kafka and queue them for the analytics worker.
+        
+        Only polling happens on this thread, so slow processing cannot delay
+        polls long enough to trigger a consumer group rebalance. When the
+        work queue is full, this thread waits for the worker to catch up,
+        or for a stop request; a batch dropped on stop is not committed and
+        is consumed again on restart.
         """
         if not self.consumer:
             self._connect()
@@ -163,51 +202,92 @@ class AnalyticsProcessor:
         
         while not self.stop_event.is_set():
             try:
-                # Poll for messages
-                msg = self.consumer.poll(timeout=1.0)
+                # Fetch a batch of messages in one call
+                msgs = self.consumer.consume(num_messages=CONSUME_BATCH_SIZE, timeout=1.0)
                 
-                if msg is None:
-                    continue
-                
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        # End of partition, not an error
-                        logger.debug(f"Reached end of partition {msg.partition()}")
-                    else:
-                        logger.error(f"Kafka error: {msg.error()}")
-                        self.metrics['processing_errors'] += 1
-                else:
-                    # Process the message
-                    start_time = time.time()
+                batch = []
+                for msg in msgs:
+                    if msg.error():
+                        if msg.error().code() == KafkaError._PARTITION_EOF:
+                            # End of partition, not an error
+                            logger.debug("Reached end of partition %s", msg.partition())
+                        else:
+                            logger.error("Kafka error: %s", msg.error())
+                            self.metrics['processing_errors'] += 1
+                        continue
                     
+                    batch.append(msg)
+                
+                # Hand the whole batch over in one queue operation
+                while batch and not self.stop_event.is_set():
                     try:
-                        # Parse message value
-                        value = json.loads(msg.value().decode('utf-8'))
-                        
+                        self.work_queue.put(batch, timeout=1.0)
+                        break
+                    except queue.Full:
+                        continue
+                    
+            except KafkaException as e:
+                logger.error(f"Kafka error in consumer loop: {e}")
+                self.metrics['processing_errors'] += 1
+                time.sleep(1)  # Wait before retrying
+    
+    def process_queue(self):
+        """
+        Process queued batches of messages until a None sentinel is received.
+        
+        The offset of each message is stored once it has been handled, so only
+        processed messages are committed.
+        """
+        processing_times = self.analytics_data['processing_times']
+        
+        while True:
+            batch = self.work_queue.get()
+            if batch is None:
+                return
+            
+            # The consumer is created by the consumer thread, so bind it per batch
+            store_offsets = self.consumer.store_offsets
+            
+            # A single try block covers the whole batch; after an error, the
+            # for loop resumes with the next message of the same iterator
+            messages = iter(batch)
+            while True:
+                try:
+                    for msg in messages:
                         # Process the message
-                        self.process_message(value)
+                        start_time = time.perf_counter()
+                        raw_value = msg.value() or b''
                         
-                        # Commit the offset
-                        self.consumer.commit(msg)
+                        # Scan the raw bytes first and only parse records that can
+                        # carry analytics data; the rest are just counted
+                        if _DATA_KEY in raw_value:
+                            value = orjson.loads(raw_value)
+                            
+                            # Process the message, reusing the size of the raw value
+                            self.process_message(value, raw_len=len(raw_value))
+                        else:
+                            self.process_message(_NO_DATA)
                         
                         # Calculate processing time
-                        processing_time = (time.time() - start_time) * 1000  # in ms
+                        processing_time = (time.perf_counter() - start_time) * 1000  # in ms
                         self.metrics['processing_latency_ms'] = processing_time
-                        self.analytics_data['processing_times'].append(processing_time)
+                        processing_times.append(processing_time)
                         
-                        # Keep only the last 1000 processing times
-                        if len(self.analytics_data['processing_times']) > 1000:
-                            self.analytics_data['processing_times'] = self.analytics_data['processing_times'][-1000:]
-                            
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Error decoding message: {e}")
-                        self.metrics['processing_errors'] += 1
-                        self.consumer.commit(msg)  # Commit anyway to avoid getting stuck
+                        store_offsets(message=msg)
+                    break
                     
-            except KafkaException as e:
-                logger.error(f"Kafka error in consumer loop: {e}")
-                self.metrics['processing_errors'] += 1
-                time.sleep(1)  # Wait before retrying
+                except orjson.JSONDecodeError as e:
+                    # Undecodable messages are committed anyway to avoid getting stuck
+                    logger.error("Error decoding message: %s", e)
+                    self.metrics['processing_errors'] += 1
+                    try:
+                        store_offsets(message=msg)
+                    except KafkaException as e:
+                        logger.warning(f"Could not store offset: {e}")
+                    
+                except KafkaException as e:
+                    # The partition was revoked; its new owner will reprocess the message
+                    logger.warning(f"Could not store offset: {e}")
     
     def start(self):
         """
@@ -220,11 +300,16 @@ class AnalyticsProcessor:
         self.stop_event.clear()
         self.running = True
         
-        # Start the consumer in a separate thread
+        # Start the consumer and the analytics worker in separate threads
         self.consumer_thread = threading.Thread(
             target=self.consume_messages,
             daemon=True
         )
+        self.worker_thread = threading.Thread(
+            target=self.process_queue,
+            daemon=True
+        )
+        self.worker_thread.start()
         self.consumer_thread.start()
         logger.info("Analytics processor started")
     
@@ -239,12 +324,28 @@ class AnalyticsProcessor:
         logger.info("Stopping analytics processor...")
         self.stop_event.set()
         
-        # Wait for the thread to finish
+        # Wait for the consumer thread to finish
         if hasattr(self, 'consumer_thread') and self.consumer_thread.is_alive():
             self.consumer_thread.join(timeout=10)
         
-        # Close the consumer
-        if self.consumer:
+        # Let the worker drain the messages already queued, then stop it
+        if hasattr(self, 'worker_thread') and self.worker_thread.is_alive():
+            try:
+                self.work_queue.put(None, timeout=10)
+                self.worker_thread.join(timeout=10)
+            except queue.Full:
+                logger.warning("Analytics worker is not draining the work queue")
+        
+        # Close the consumer, committing the stored offsets. A thread still
+        # using it would fail on the closed consumer, so it is left open then.
+        threads_alive = any(
+            thread.is_alive()
+            for thread in (getattr(self, 'consumer_thread', None), getattr(self, 'worker_thread', None))
+            if thread is not None
+        )
+        if threads_alive:
+            logger.warning("Analytics threads did not stop, leaving the consumer open")
+        elif self.consumer:
             self.consumer.close()
             
         self.running = False
@@ -257,6 +358,9 @@ class AnalyticsProcessor:
         Returns:
             Dictionary of metrics
         """
+        if self._last_message_ts is not None:
+            self.metrics['last_message_time'] = datetime.fromtimestamp(self._last_message_ts).isoformat()
+        
         # Add some computed metrics
         if self.analytics_data['processing_times']:
             avg_processing_time = sum(self.analytics_data['processing_times']) / len(self.analytics_data['processing_times'])
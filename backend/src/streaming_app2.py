@@ -4,15 +4,22 @@ Streaming Application 2: Real-time Data Processor
 This application consumes data from Kafka for real-time processing and alerting.
 It demonstrates how the same data stream can be used by different applications.
 """
-import json
+import array
 import logging
+import multiprocessing
+import queue
+import socket
 import time
 import threading
 import signal
 import sys
+from collections import deque
+from dataclasses import asdict, dataclass
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Callable
+from itertools import islice
+from typing import Dict, Any, Deque, List, Optional, Callable
 
+import orjson
 from confluent_kafka import Consumer, KafkaError, KafkaException
 
 from backend.src.config.config import (
@@ -31,6 +38,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger('streaming_app2')
 
+# Maximum time each consume() call blocks, which bounds how long stop() waits
+# for the consumer thread; librdkafka prefetches in the background meanwhile
+CONSUME_TIMEOUT_SECONDS = 0.05
+
+# Bounds of the adaptive consume() batch size
+MIN_CONSUME_BATCH_SIZE = 16
+MAX_CONSUME_BATCH_SIZE = 2000
+
+# Counter slot indices
+MESSAGES_PROCESSED = 0
+ALERTS_TRIGGERED = 1
+PROCESSING_ERRORS = 2
+
+# Metric names of the counter slots, in slot order
+_COUNTER_NAMES = ('messages_processed', 'alerts_triggered', 'processing_errors')
+
+# Processing latency is measured for one message in this many
+LATENCY_SAMPLE_EVERY = 64
+
+# Weight of a new latency sample in the moving average
+LATENCY_EWMA_WEIGHT = 0.1
+
+# Messages larger than this many bytes trigger the large_payload alert
+LARGE_PAYLOAD_BYTES = 10000
+
+# Fields of the message data whose value can mark an error message
+_ERROR_VALUE_FIELDS = ('status', 'level', 'event_type', 'type')
+
+# Lower-cased values of those fields that mark an error message; a set lookup
+# costs the same however many keywords are added
+_ERROR_VALUES = frozenset(('error', 'fatal', 'critical'))
+
+def _is_high_priority(message: Dict[str, Any], raw_len: int) -> bool:
+    """
+    Alert on messages whose data has a high priority.
+    """
+    data = message.get('data')
+    return isinstance(data, dict) and data.get('priority') == 'high'
+
+def _is_error_message(message: Dict[str, Any], raw_len: int) -> bool:
+    """
+    Alert on messages whose data carries an error field or an error status,
+    such as a level of 'ERROR' or 'CRITICAL'.
+    
+    Only the known error fields are inspected rather than the whole
+    stringified data.
+    """
+    data = message.get('data')
+    if not isinstance(data, dict):
+        return False
+    if 'error' in data or 'error_message' in data:
+        return True
+    for field in _ERROR_VALUE_FIELDS:
+        value = data.get(field)
+        if type(value) is str and value.lower() in _ERROR_VALUES:
+            return True
+    return False
+
+def _is_large_payload(message: Dict[str, Any], raw_len: int) -> bool:
+    """
+    Alert on messages larger than LARGE_PAYLOAD_BYTES.
+    """
+    return raw_len > LARGE_PAYLOAD_BYTES
+
+@dataclass
+class AlertRecord:
+    """
+    An alert triggered by a message, as kept in the alert history.
+    """
+    # Declared by hand rather than with dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('alert_name', 'message_id', 'timestamp', 'message_snippet')
+    
+    alert_name: str
+    message_id: str
+    timestamp: str
+    message_snippet: str
+
+def _message_snippet(message: Dict[str, Any], raw_value: Optional[bytes] = None) -> str:
+    """
+    Get the first 100 characters of a message for the alert history.
+    
+    The raw bytes are sliced when available, which avoids a repr() of the
+    whole message.
+    """
+    if raw_value is not None:
+        snippet = raw_value[:100].decode('utf-8', errors='replace')
+        return snippet + '...' if len(raw_value) > 100 else snippet
+    
+    text = str(message)
+    return text[:100] + '...' if len(text) > 100 else text
+
 class RealTimeProcessor:
     """
     Real-time processor that consumes data from Kafka for immediate processing and alerting.
@@ -38,7 +136,15 @@ class RealTimeProcessor:
     
     def __init__(self, bootstrap_servers: Optional[str] = None, 
                  topic: Optional[str] = None, 
-                 group_id: str = 'realtime-processor'):
+                 group_id: str = 'realtime-processor',
+                 num_messages: int = 500,
+                 commit_every: int = 64,
+                 fetch_min_bytes: int = 65536,
+                 fetch_wait_max_ms: int = 200,
+                 fetch_message_max_bytes: int = 4000000,
+                 queued_min_messages: int = 500000,
+                 queued_max_messages_kbytes: int = 1048576,
+                 group_instance_id: Optional[str] = None):
         """
         Initialize the real-time processor.
         
@@ -46,32 +152,85 @@ class RealTimeProcessor:
             bootstrap_servers: Kafka bootstrap servers
             topic: Kafka topic to consume from
             group_id: Consumer group ID
+            num_messages: Initial number of messages fetched from Kafka per consume() call.
+                The batch size then adapts between MIN_CONSUME_BATCH_SIZE and
+                MAX_CONSUME_BATCH_SIZE to how busy the processing is.
+            commit_every: Number of handled messages between asynchronous offset commits
+            fetch_min_bytes: Minimum data the broker accumulates before answering a fetch.
+                Larger values mean fewer round trips for small messages, at the cost of
+                up to fetch_wait_max_ms extra latency when traffic is light.
+            fetch_wait_max_ms: Maximum time the broker waits to reach fetch_min_bytes
+            fetch_message_max_bytes: Maximum data fetched per partition per request
+            queued_min_messages: Messages per partition librdkafka tries to keep prefetched
+            queued_max_messages_kbytes: Maximum size of the local prefetch queue in kilobytes.
+                librdkafka fills this queue in the background, so consume() mostly
+                drains local memory instead of waiting on the broker.
+            group_instance_id: Static group membership ID, so a restarted consumer
+                keeps its partitions without a rebalance
         """
         self.bootstrap_servers = bootstrap_servers or KAFKA_BOOTSTRAP_SERVERS
         self.topic = topic or KAFKA_TOPIC
         self.group_id = group_id
-        self.consumer = None
+        self.num_messages = num_messages
+        self._batch_size = num_messages
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self.fetch_min_bytes = fetch_min_bytes
+        self.fetch_wait_max_ms = fetch_wait_max_ms
+        self.fetch_message_max_bytes = fetch_message_max_bytes
+        self.queued_min_messages = queued_min_messages
+        self.queued_max_messages_kbytes = queued_max_messages_kbytes
+        self.group_instance_id = group_instance_id
+        self.consumer: Optional[Consumer] = None
         self.running = False
         self.stop_event = threading.Event()
         
+        # Time of the last processed message, formatted in get_metrics()
+        self._last_message_ts: Optional[float] = None
+        
+        # Messages left until the next latency sample, and the moving average
+        # reported as processing_latency_ms
+        self._until_latency_sample = 1
+        self._latency_ewma_ms: Optional[float] = None
+        
+        # Consumer processes started by start(n_workers) and the counters they
+        # share, one slot per entry of _COUNTER_NAMES for each process
+        self._worker_processes: List[multiprocessing.Process] = []
+        self._process_stop = None
+        self._shared_counts = None
+        self._shared_slot: Optional[int] = None
+        
+        # Queue on which consumer processes report their new alerts, last
+        # message time and latency, the number of alerts a process has
+        # reported so far, and the latest latency reported by each process
+        self._results = None
+        self._published_alerts = 0
+        self._worker_latency_ms: Dict[int, float] = {}
+        
+        # Counters updated for every message, indexed by the slot constants.
+        # Each increment is a single store into the array; get_metrics() copies
+        # them into the metrics dictionary.
+        self._counts = array.array('q', [0] * len(_COUNTER_NAMES))
+        
         # Metrics for monitoring
-        self.metrics = {
+        self.metrics: Dict[str, Any] = {
             'messages_processed': 0,
             'alerts_triggered': 0,
             'processing_errors': 0,
             'last_message_time': None,
-            'processing_latency_ms': 0
+            'processing_latency_ms': 0,
+            'adaptive_batch': num_messages
         }
         
-        # Alert thresholds and handlers
-        self.alert_thresholds = {
-            'high_priority': lambda msg: msg.get('data', {}).get('priority') == 'high',
-            'error_message': lambda msg: 'error' in str(msg.get('data', {})).lower(),
-            'large_payload': lambda msg: len(json.dumps(msg)) > 10000  # Alert on messages > 10KB
+        # Alert thresholds, each called with the message and its encoded size
+        self.alert_thresholds: Dict[str, Callable[[Dict[str, Any], int], bool]] = {
+            'high_priority': _is_high_priority,
+            'error_message': _is_error_message,
+            'large_payload': _is_large_payload
         }
         
         # Alert history (in a real application, this would be in a database)
-        self.alert_history = []
+        self.alert_history: Deque[AlertRecord] = deque(maxlen=1000)  # Last 1000 alerts
         
         # Set up signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -94,11 +253,23 @@ class RealTimeProcessor:
             'bootstrap.servers': self.bootstrap_servers,
             'group.id': self.group_id,
             'auto.offset.reset': 'earliest',
+            # Offsets are stored for each handled message and committed
+            # asynchronously every commit_every messages
             'enable.auto.commit': False,
+            'enable.auto.offset.store': False,
             'max.poll.interval.ms': 300000,  # 5 minutes
             'session.timeout.ms': 30000,  # 30 seconds
+            'fetch.min.bytes': self.fetch_min_bytes,
+            'fetch.wait.max.ms': self.fetch_wait_max_ms,
+            'fetch.message.max.bytes': self.fetch_message_max_bytes,
+            'queued.min.messages': self.queued_min_messages,
+            'queued.max.messages.kbytes': self.queued_max_messages_kbytes,
+            'enable.partition.eof': False,  # Don't wake the consume loop at partition ends
         }
         
+        if self.group_instance_id:
+            config['group.instance.id'] = self.group_instance_id
+        
         # Add security configuration if provided
         if KAFKA_SECURITY_PROTOCOL:
             config['security.protocol'] = KAFKA_SECURITY_PROTOCOL
@@ -117,36 +288,46 @@ class RealTimeProcessor:
             logger.error(f"Error connecting to Kafka: {e}")
             raise
     
-    def check_alerts(self, message: Dict[str, Any]) -> List[str]:
+    def check_alerts(self, message: Dict[str, Any], raw_len: Optional[int] = None,
+                     timestamp: Optional[float] = None,
+                     raw_value: Optional[bytes] = None) -> List[str]:
         """
         Check if a message triggers any alerts.
         
         Args:
             message: Message from Kafka
+            raw_len: Size of the encoded message in bytes, if known.
+                Otherwise the message is re-serialized to measure it.
+            timestamp: Epoch time in seconds recorded for triggered alerts. Defaults to now.
+            raw_value: The encoded message, if available, used for alert snippets
             
         Returns:
             List of triggered alert names
         """
-        triggered_alerts = []
+        triggered_alerts: List[str] = []
+        
+        if raw_len is None:
+            raw_len = len(orjson.dumps(message))
+        alert_time = None
+        snippet = None
         
         for alert_name, threshold_func in self.alert_thresholds.items():
             try:
-                if threshold_func(message):
+                if threshold_func(message, raw_len):
                     triggered_alerts.append(alert_name)
-                    self.metrics['alerts_triggered'] += 1
+                    self._counts[ALERTS_TRIGGERED] += 1
                     
-                    # Add to alert history
-                    alert_record = {
-                        'alert_name': alert_name,
-                        'message_id': message.get('message_id', 'unknown'),
-                        'timestamp': datetime.now().isoformat(),
-                        'message_snippet': str(message)[:100] + '...' if len(str(message)) > 100 else str(message)
-                    }
-                    self.alert_history.append(alert_record)
-                    
-                    # Keep alert history at a reasonable size
-                    if len(self.alert_history) > 1000:
-                        self.alert_history = self.alert_history[-1000:]
+                    # Add to alert history, formatting the time and snippet once per message
+                    if alert_time is None:
+                        alert_time = (datetime.fromtimestamp(timestamp) if timestamp is not None
+                                      else datetime.now()).isoformat()
+                        snippet = _message_snippet(message, raw_value)
+                    self.alert_history.append(AlertRecord(
+                        alert_name,
+                        message.get('message_id', 'unknown'),
+                        alert_time,
+                        snippet
+                    ))
                         
                     # Log the alert
                     logger.warning(f"Alert '{alert_name}' triggered by message {message.get('message_id', 'unknown')}")
@@ -155,38 +336,68 @@ class RealTimeProcessor:
         
         return triggered_alerts
     
-    def process_message(self, message: Dict[str, Any]):
+    def process_message(self, message: Dict[str, Any], raw_len: Optional[int] = None,
+                        timestamp: Optional[float] = None, raw_value: Optional[bytes] = None):
         """
         Process a message for real-time handling.
         
         Args:
             message: Message from Kafka
+            raw_len: Size of the encoded message in bytes, if known
+            timestamp: Processing time as epoch seconds, usually shared by a
+                consumed batch. Defaults to now.
+            raw_value: The encoded message, if available
         """
         try:
-            # Process message in real-time (example: enrich with additional data)
-            enriched_data = {
-                'original_message': message,
-                'processing_time': datetime.now().isoformat(),
-                'source_topic': self.topic
-            }
-            
-            # Check if any alerts are triggered
-            triggered_alerts = self.check_alerts(message)
+            if timestamp is None:
+                timestamp = time.time()
             
-            if triggered_alerts:
-                enriched_data['triggered_alerts'] = triggered_alerts
-                # In a real application, this could send notifications or take other actions
-                
-            # Real-time processing would normally do something with the enriched data
-            # For example, store it in a database, send it to another system, etc.
+            # Check if any alerts are triggered; they are recorded in the alert history
+            self.check_alerts(message, raw_len, timestamp, raw_value)
             
             # Update metrics
-            self.metrics['messages_processed'] += 1
-            self.metrics['last_message_time'] = datetime.now().isoformat()
+            self._counts[MESSAGES_PROCESSED] += 1
+            self._last_message_ts = timestamp
             
         except Exception as e:
             logger.error(f"Error processing message for real-time handling: {e}")
-            self.metrics['processing_errors'] += 1
+            self._counts[PROCESSING_ERRORS] += 1
+    
+    def _record_latency(self, sample_ms: float):
+        """
+        Update the processing latency moving average with a sample.
+        
+        Args:
+            sample_ms: Processing time of one message in milliseconds
+        """
+        if self._latency_ewma_ms is None:
+            self._latency_ewma_ms = sample_ms
+        else:
+            self._latency_ewma_ms += LATENCY_EWMA_WEIGHT * (sample_ms - self._latency_ewma_ms)
+        self.metrics['processing_latency_ms'] = self._latency_ewma_ms
+    
+    def _adapt_batch_size(self, received: int, wait_seconds: float, work_seconds: float):
+        """
+        Adjust the consume() batch size to the share of time spent processing.
+        
+        The batch doubles while processing takes under 20% of a cycle and
+        batches come back full, and halves once it takes over 80%.
+        
+        Args:
+            received: Number of messages returned by the last consume() call
+            wait_seconds: Time spent waiting in consume()
+            work_seconds: Time spent processing the batch
+        """
+        cycle_seconds = wait_seconds + work_seconds
+        if cycle_seconds <= 0:
+            return
+        
+        work_ratio = work_seconds / cycle_seconds
+        if work_ratio < 0.2 and received == self._batch_size:
+            self._batch_size = min(MAX_CONSUME_BATCH_SIZE, self._batch_size * 2)
+        elif work_ratio > 0.8:
+            self._batch_size = max(MIN_CONSUME_BATCH_SIZE, self._batch_size // 2)
+        self.metrics['adaptive_batch'] = self._batch_size
     
     def consume_messages(self):
         """
@@ -199,50 +410,160 @@ class RealTimeProcessor:
         
         while not self.stop_event.is_set():
             try:
-                # Poll for messages
-                msg = self.consumer.poll(timeout=1.0)
+                # Fetch a batch of messages in one call
+                wait_start = time.perf_counter()
+                msgs = self.consumer.consume(num_messages=self._batch_size,
+                                             timeout=CONSUME_TIMEOUT_SECONDS)
+                work_start = time.perf_counter()
                 
-                if msg is None:
-                    continue
+                # Messages of a batch share one processing timestamp; a batch
+                # spans well under a second, so little precision is lost
+                batch_ts = time.time()
                 
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        # End of partition, not an error
-                        logger.debug(f"Reached end of partition {msg.partition()}")
-                    else:
-                        logger.error(f"Kafka error: {msg.error()}")
-                        self.metrics['processing_errors'] += 1
-                else:
-                    # Process the message
-                    start_time = time.time()
+                for msg in msgs:
+                    if msg.error():
+                        if msg.error().code() == KafkaError._PARTITION_EOF:
+                            # End of partition, not an error
+                            logger.debug(f"Reached end of partition {msg.partition()}")
+                        else:
+                            logger.error(f"Kafka error: {msg.error()}")
+                            self._counts[PROCESSING_ERRORS] += 1
+                        continue
+                    
+                    # Time one message in every LATENCY_SAMPLE_EVERY
+                    self._until_latency_sample -= 1
+                    sampled = self._until_latency_sample == 0
+                    if sampled:
+                        self._until_latency_sample = LATENCY_SAMPLE_EVERY
+                        start_ns = time.perf_counter_ns()
                     
                     try:
-                        # Parse message value
-                        value = json.loads(msg.value().decode('utf-8'))
-                        
-                        # Process the message
-                        self.process_message(value)
+                        # Parse message value, orjson reads the bytes directly
+                        raw_value = msg.value()
+                        value = orjson.loads(raw_value)
                         
-                        # Commit the offset
-                        self.consumer.commit(msg)
+                        # Process the message, reusing the size of the raw value
+                        self.process_message(value, len(raw_value), batch_ts, raw_value)
                         
-                        # Calculate processing time
-                        processing_time = (time.time() - start_time) * 1000  # in ms
-                        self.metrics['processing_latency_ms'] = processing_time
+                        # Fold the sampled processing time into the moving average
+                        if sampled:
+                            self._record_latency((time.perf_counter_ns() - start_ns) / 1e6)
                             
-                    except json.JSONDecodeError as e:
+                    except orjson.JSONDecodeError as e:
                         logger.error(f"Error decoding message: {e}")
-                        self.metrics['processing_errors'] += 1
-                        self.consumer.commit(msg)  # Commit anyway to avoid getting stuck
+                        self._counts[PROCESSING_ERRORS] += 1
+                    
+                    # Undecodable messages are committed anyway to avoid getting stuck
+                    try:
+                        self.consumer.store_offsets(message=msg)
+                        self._uncommitted += 1
+                    except KafkaException as e:
+                        # The partition was revoked; its new owner will reprocess the message
+                        logger.warning(f"Could not store offset: {e}")
+                
+                self._adapt_batch_size(len(msgs), work_start - wait_start,
+                                       time.perf_counter() - work_start)
+                
+                # Commit the stored offsets without waiting for the broker
+                if self._uncommitted >= self.commit_every:
+                    self.consumer.commit(asynchronous=True)
+                    self._uncommitted = 0
+                
+                # Consumer processes report their counters and results once per batch
+                if self._shared_slot is not None:
+                    self._publish_counters()
+                    if msgs:
+                        self._publish_results()
                     
             except KafkaException as e:
                 logger.error(f"Kafka error in consumer loop: {e}")
-                self.metrics['processing_errors'] += 1
+                self._counts[PROCESSING_ERRORS] += 1
                 time.sleep(1)  # Wait before retrying
     
-    def start(self):
+    def _publish_counters(self):
+        """
+        Copy this consumer process's counters into its shared slots.
+        """
+        base = self._shared_slot * len(_COUNTER_NAMES)
+        self._shared_counts[base:base + len(_COUNTER_NAMES)] = self._counts.tolist()
+    
+    def _publish_results(self):
+        """
+        Send the alerts triggered since the last report, the last message
+        time and the processing latency of this consumer process to the parent.
+        """
+        new_alerts = min(self._counts[ALERTS_TRIGGERED] - self._published_alerts, len(self.alert_history))
+        alerts = list(islice(self.alert_history, len(self.alert_history) - new_alerts, None))
+        self._published_alerts = self._counts[ALERTS_TRIGGERED]
+        self._results.put((self._shared_slot, alerts, self._last_message_ts, self._latency_ewma_ms))
+    
+    def _drain_results(self):
+        """
+        Merge the results reported by the consumer processes into this processor.
+        """
+        if self._results is None:
+            return
+        
+        while True:
+            try:
+                slot, alerts, last_message_ts, latency_ms = self._results.get_nowait()
+            except queue.Empty:
+                break
+            
+            self.alert_history.extend(alerts)
+            if last_message_ts is not None and (self._last_message_ts is None or
+                                                last_message_ts > self._last_message_ts):
+                self._last_message_ts = last_message_ts
+            if latency_ms is not None:
+                self._worker_latency_ms[slot] = latency_ms
+        
+        if self._worker_latency_ms:
+            self.metrics['processing_latency_ms'] = (
+                sum(self._worker_latency_ms.values()) / len(self._worker_latency_ms))
+    
+    def _close_consumer(self):
+        """
+        Commit the remaining stored offsets synchronously, then close the consumer.
+        """
+        if self.consumer:
+            if self._uncommitted:
+                try:
+                    self.consumer.commit(asynchronous=False)
+                except KafkaException as e:
+                    logger.warning(f"Could not commit offsets: {e}")
+                self._uncommitted = 0
+            self.consumer.close()
+    
+    def _processor_kwargs(self) -> Dict[str, Any]:
+        """
+        Get the constructor arguments that recreate this processor's configuration.
+        
+        Returns:
+            Keyword arguments for RealTimeProcessor
+        """
+        return {
+            'bootstrap_servers': self.bootstrap_servers,
+            'topic': self.topic,
+            'group_id': self.group_id,
+            'num_messages': self.num_messages,
+            'commit_every': self.commit_every,
+            'fetch_min_bytes': self.fetch_min_bytes,
+            'fetch_wait_max_ms': self.fetch_wait_max_ms,
+            'fetch_message_max_bytes': self.fetch_message_max_bytes,
+            'queued_min_messages': self.queued_min_messages,
+            'queued_max_messages_kbytes': self.queued_max_messages_kbytes
+        }
+    
+    def start(self, n_workers: Optional[int] = None):
         """
         Start consuming and processing messages.
+        
+        Args:
+            n_workers: Number of consumer processes. With more than one, each
+                process joins the consumer group with its own static membership
+                ID, so Kafka spreads the partitions across processes and JSON
+                decoding is not limited to one interpreter. Defaults to a single
+                consumer thread in this process.
         """
         if self.running:
             logger.warning("Real-time processor is already running")
@@ -251,6 +572,11 @@ class RealTimeProcessor:
         self.stop_event.clear()
         self.running = True
         
+        if n_workers and n_workers > 1:
+            self._start_processes(n_workers)
+            logger.info(f"Real-time processor started with {n_workers} consumer processes")
+            return
+        
         # Start the consumer in a separate thread
         self.consumer_thread = threading.Thread(
             target=self.consume_messages,
@@ -259,6 +585,37 @@ class RealTimeProcessor:
         self.consumer_thread.start()
         logger.info("Real-time processor started")
     
+    def _start_processes(self, n_workers: int):
+        """
+        Start consumer processes in the consumer group.
+        
+        Args:
+            n_workers: Number of consumer processes
+        """
+        # Spawn rather than fork, so no librdkafka or thread state is inherited
+        ctx = multiprocessing.get_context('spawn')
+        self._process_stop = ctx.Event()
+        self._shared_counts = ctx.RawArray('q', n_workers * len(_COUNTER_NAMES))
+        self._results = ctx.Queue()
+        self._worker_latency_ms = {}
+        kwargs = self._processor_kwargs()
+        
+        # Membership IDs include the host name, so deployments on different
+        # hosts do not fence each other out of the group, while a restarted
+        # process on the same host keeps its ID
+        host = socket.gethostname()
+        self._worker_processes = [
+            ctx.Process(
+                target=_consume_in_process,
+                args=(kwargs, f"{self.group_id}-{host}-{slot}", self._process_stop,
+                      self._shared_counts, slot, self._results),
+                daemon=True
+            )
+            for slot in range(n_workers)
+        ]
+        for process in self._worker_processes:
+            process.start()
+    
     def stop(self):
         """
         Stop consuming messages and close the consumer.
@@ -270,13 +627,36 @@ class RealTimeProcessor:
         logger.info("Stopping real-time processor...")
         self.stop_event.set()
         
+        # Stop the consumer processes, which commit and close their own consumers.
+        # Their results are drained meanwhile, since a process exits only once
+        # everything it queued has been read.
+        if self._worker_processes:
+            self._process_stop.set()
+            deadline = time.monotonic() + 10
+            for process in self._worker_processes:
+                while process.is_alive() and time.monotonic() < deadline:
+                    self._drain_results()
+                    process.join(timeout=0.1)
+                if process.is_alive():
+                    logger.warning(f"Consumer process {process.pid} did not stop, terminating it")
+                    process.terminate()
+            self._worker_processes = []
+            self._drain_results()
+            
+            # Keep the processes' final counters, so a later run in this
+            # process starts from them rather than from the shared slots
+            shared = self._shared_counts[:]
+            for idx in range(len(_COUNTER_NAMES)):
+                self._counts[idx] += sum(shared[idx::len(_COUNTER_NAMES)])
+            self._process_stop = None
+            self._shared_counts = None
+            self._results = None
+        
         # Wait for the thread to finish
         if hasattr(self, 'consumer_thread') and self.consumer_thread.is_alive():
             self.consumer_thread.join(timeout=10)
         
-        # Close the consumer
-        if self.consumer:
-            self.consumer.close()
+        self._close_consumer()
             
         self.running = False
         logger.info("Real-time processor stopped")
@@ -288,6 +668,21 @@ class RealTimeProcessor:
         Returns:
             Dictionary of metrics
         """
+        self._drain_results()
+        
+        if self._last_message_ts is not None:
+            self.metrics['last_message_time'] = datetime.fromtimestamp(self._last_message_ts).isoformat()
+        
+        # Sum the counters reported by consumer processes, if any
+        counts = self._counts.tolist()
+        if self._shared_counts is not None and self._shared_slot is None:
+            shared = self._shared_counts[:]
+            for idx in range(len(_COUNTER_NAMES)):
+                counts[idx] += sum(shared[idx::len(_COUNTER_NAMES)])
+        
+        for idx, name in enumerate(_COUNTER_NAMES):
+            self.metrics[name] = counts[idx]
+        
         return self.metrics
     
     def get_recent_alerts(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -300,7 +695,44 @@ class RealTimeProcessor:
         Returns:
             List of recent alerts
         """
-        return self.alert_history[-limit:] if self.alert_history else []
+        self._drain_results()
+        
+        return [
+            asdict(alert)
+            for alert in islice(self.alert_history, max(0, len(self.alert_history) - limit), None)
+        ]
+
+def _consume_in_process(kwargs: Dict[str, Any], group_instance_id: str, stop_event,
+                        shared_counts, slot: int, results):
+    """
+    Entry point of a consumer process started by RealTimeProcessor.start().
+    
+    Args:
+        kwargs: Constructor arguments of the parent processor
+        group_instance_id: Static group membership ID of this process
+        stop_event: Event set by the parent to stop consuming
+        shared_counts: Counters shared with the parent
+        slot: Index of this process's counters in shared_counts
+        results: Queue on which alerts, the last message time and latency are reported
+    """
+    processor = RealTimeProcessor(group_instance_id=group_instance_id, **kwargs)
+    
+    # The parent handles interrupts and stops the processes through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    
+    processor.stop_event = stop_event
+    processor._shared_counts = shared_counts
+    processor._shared_slot = slot
+    processor._results = results
+    processor.running = True
+    
+    try:
+        processor.consume_messages()
+    finally:
+        processor._publish_counters()
+        processor._publish_results()
+        processor._close_consumer()
 
 if __name__ == '__main__':
     # Create and start the real-time processor
@@ -0,0 +1,158 @@
+"""
+Metrics module for the data streaming service.
+Provides fixed-slot counters shared between the streaming thread and the API handlers.
+"""
+import array
+import enum
+import itertools
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import orjson
+
+# Counter slot indices
+MESSAGES_PROCESSED = 0
+PROCESSING_ERRORS = 1
+KAFKA_SEND_ERRORS = 2
+STREAM_STATUS = 3
+
+_NUM_SLOTS = 4
+
+
+class StreamStatus(enum.IntEnum):
+    """
+    Status of the streaming process, stored as an integer counter slot.
+    """
+    STOPPED = 0
+    RUNNING = 1
+
+    def __str__(self) -> str:
+        return self.name.lower()
+
+
+class Counters:
+    """
+    Preallocated integer counters for the streaming process.
+
+    Counters live in ``array.array`` instances indexed by the module-level slot
+    constants, so an increment is one indexed store instead of a dict hash and
+    lookup. Each writing thread increments its own array, registered on its
+    first increment, so concurrent streaming workers never read-modify-write
+    the same slot. Readers sum the per-thread arrays into a snapshot.
+
+    Every update bumps an epoch counter, so the serialized metrics are only
+    rebuilt when something has changed since the last request.
+    """
+
+    def __init__(self):
+        """
+        Initialize all counters to zero and the stream status to stopped.
+        """
+        # Slots that are set rather than incremented, such as the stream status
+        self._counts = array.array('q', [0] * _NUM_SLOTS)
+        self._local = threading.local()
+        self._thread_counts: List[array.array] = []
+        self._register_lock = threading.Lock()
+        self._last_processing_time: Optional[str] = None
+        # Epochs are drawn from a shared counter, whose next() is atomic, so
+        # concurrent updates never store the same epoch as an earlier one
+        self._epochs = itertools.count(1)
+        self._epoch = 0
+        self._cached_epoch = -1
+        self._cached_json = b''
+
+    def _register_thread(self) -> array.array:
+        """
+        Create and register the counter array for the calling thread.
+
+        Returns:
+            The calling thread's counter array
+        """
+        counts = array.array('q', [0] * _NUM_SLOTS)
+        with self._register_lock:
+            self._thread_counts.append(counts)
+        self._local.counts = counts
+        return counts
+
+    def inc(self, idx: int, amount: int = 1):
+        """
+        Increment a counter slot.
+
+        Args:
+            idx: Counter slot index
+            amount: Amount to add
+        """
+        try:
+            counts = self._local.counts
+        except AttributeError:
+            counts = self._register_thread()
+        counts[idx] += amount
+        self._epoch = next(self._epochs)
+
+    def snapshot(self) -> Tuple[int, ...]:
+        """
+        Get a copy of all counter slots, summed across threads.
+
+        Returns:
+            Tuple of counter values indexed by slot
+        """
+        totals = self._counts[:]
+        with self._register_lock:
+            thread_counts = list(self._thread_counts)
+        for counts in thread_counts:
+            for idx, value in enumerate(counts):
+                totals[idx] += value
+        return tuple(totals)
+
+    @property
+    def status(self) -> StreamStatus:
+        """
+        Current stream status.
+        """
+        return StreamStatus(self._counts[STREAM_STATUS])
+
+    @status.setter
+    def status(self, value: StreamStatus):
+        self._counts[STREAM_STATUS] = value
+        self._epoch = next(self._epochs)
+
+    @property
+    def last_processing_time(self) -> Optional[str]:
+        """
+        ISO timestamp of the last successfully processed message.
+        """
+        return self._last_processing_time
+
+    @last_processing_time.setter
+    def last_processing_time(self, value: Optional[str]):
+        self._last_processing_time = value
+        self._epoch = next(self._epochs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the metrics in the JSON schema served by the API.
+
+        Returns:
+            Dictionary of metrics
+        """
+        counts = self.snapshot()
+        return {
+            'messages_processed': counts[MESSAGES_PROCESSED],
+            'processing_errors': counts[PROCESSING_ERRORS],
+            'last_processing_time': self._last_processing_time,
+            'kafka_send_errors': counts[KAFKA_SEND_ERRORS],
+            'stream_status': str(StreamStatus(counts[STREAM_STATUS]))
+        }
+
+    def json_bytes(self) -> bytes:
+        """
+        Get the metrics serialized as JSON.
+
+        Returns:
+            JSON document in the schema of to_dict(), reused while unchanged
+        """
+        epoch = self._epoch
+        if epoch != self._cached_epoch:
+            self._cached_json = orjson.dumps(self.to_dict())
+            self._cached_epoch = epoch
+        return self._cached_json
@@ -5,15 +5,26 @@ import logging
 import time
 import threading
 import json
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 
 from src.connectors.sqs_connector import SQSConnector
 from src.connectors.kafka_connector import KafkaConnector
-from src.config.config import KAFKA_TOPIC
+from src.utils.metrics import (
+    Counters,
+    MESSAGES_PROCESSED,
+    PROCESSING_ERRORS,
+    KAFKA_SEND_ERRORS
+)
 
 logger = logging.getLogger(__name__)
 
+# The Kafka producer is flushed once per this many receives or seconds,
+# whichever comes first, so it can batch messages across receives
+FLUSH_EVERY_BATCHES = 16
+FLUSH_INTERVAL_SECONDS = 1.0
+
 class StreamProcessor:
     """
     Stream processor that connects AWS SQS to Kafka.
@@ -36,12 +47,20 @@ class StreamProcessor:
         self.thread = None
         self.stop_event = threading.Event()
         
-    def process_message(self, message: Dict[str, Any]) -> bool:
+        # The worker thread is started once and then reused across start/stop
+        # cycles; each run is handed to it through the start event.
+        self._start_event = threading.Event()
+        self._run_metrics: Optional[Counters] = None
+        self._run_future: Optional[Future] = None
+        
+    def process_message(self, message: Dict[str, Any], timestamp: Optional[str] = None) -> bool:
         """
         Process a single message from SQS and send it to Kafka.
         
         Args:
             message: Message from SQS
+            timestamp: ISO timestamp added to the message, usually shared by a
+                received batch. Defaults to now.
             
         Returns:
             True if processing was successful, False otherwise
@@ -54,7 +73,7 @@ class StreamProcessor:
             enriched_message = {
                 'message_id': message_id,
                 'source': 'aws-sqs',
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp or datetime.now().isoformat(),
                 'data': body
             }
             
@@ -77,82 +96,155 @@ class StreamProcessor:
             logger.error(f"Error processing message: {e}")
             return False
     
-    def streaming_worker(self, metrics: Optional[Dict[str, Any]] = None):
+    def streaming_worker(self, metrics: Optional[Counters] = None):
         """
         Worker function that continuously processes messages from SQS to Kafka.
         
+        While a batch is processed, the next one is already being long-polled
+        on a receiver thread. Messages within a batch are processed in order
+        on this thread, since sending to Kafka only queues them in the producer.
+        
         Args:
-            metrics: Optional dictionary to update with metrics
+            metrics: Optional counters to update with metrics
         """
         logger.info("Streaming worker started")
         
-        while not self.stop_event.is_set():
+        batches_since_flush = 0
+        last_flush = time.monotonic()
+        
+        receiver = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqs-receive')
+        next_batch: Optional[Future] = None
+        
+        # A batch prefetched before the stop request is still processed
+        while next_batch is not None or not self.stop_event.is_set():
             try:
-                # Receive messages from SQS
-                start_time = time.time()
-                messages = self.sqs_connector.receive_messages(max_messages=10)
+                # Receive messages from SQS, or take the prefetched batch
+                if next_batch is None:
+                    messages = self.sqs_connector.receive_messages(max_messages=10)
+                else:
+                    future, next_batch = next_batch, None
+                    messages = future.result()
+                
+                # Long-poll the next batch in the background; after an empty
+                # receive the worker waits instead
+                if messages and not self.stop_event.is_set():
+                    next_batch = receiver.submit(self.sqs_connector.receive_messages, max_messages=10)
+                
+                # Messages of a batch share one timestamp, taken once per receive
+                batch_ts = datetime.now().isoformat() if messages else None
+                
+                # Receipt handles of the processed messages, deleted in one batch
+                successful_receipts = []
                 
                 # Process each message
                 for message in messages:
                     try:
-                        success = self.process_message(message)
+                        success = self.process_message(message, batch_ts)
                         
                         if success:
                             # Delete the message from SQS if processing was successful
-                            self.sqs_connector.delete_message(message['receipt_handle'])
+                            successful_receipts.append(message['receipt_handle'])
                             
                             # Update metrics
                             if metrics is not None:
-                                metrics['messages_processed'] += 1
-                                metrics['last_processing_time'] = datetime.now().isoformat()
+                                metrics.inc(MESSAGES_PROCESSED)
+                                metrics.last_processing_time = batch_ts
                         else:
                             # Update error metrics
                             if metrics is not None:
-                                metrics['kafka_send_errors'] += 1
+                                metrics.inc(KAFKA_SEND_ERRORS)
                     except Exception as e:
                         logger.error(f"Error in message processing loop: {e}")
                         if metrics is not None:
-                            metrics['processing_errors'] += 1
+                            metrics.inc(PROCESSING_ERRORS)
                 
-                # Ensure all messages are sent to Kafka
-                self.kafka_connector.flush()
+                if successful_receipts:
+                    self.sqs_connector.delete_messages(successful_receipts)
+                
+                # Flush periodically rather than after every receive; the
+                # connector's poll thread services delivery callbacks meanwhile
+                batches_since_flush += 1
+                now = time.monotonic()
+                if (batches_since_flush >= FLUSH_EVERY_BATCHES or
+                        now - last_flush >= FLUSH_INTERVAL_SECONDS):
+                    self.kafka_connector.flush()
+                    batches_since_flush = 0
+                    last_flush = now
                 
                 # If no messages were received, wait before polling again
                 if not messages:
-                    time.sleep(5)
+                    self.stop_event.wait(5)
                     
             except Exception as e:
                 logger.error(f"Error in streaming worker: {e}")
                 if metrics is not None:
-                    metrics['processing_errors'] += 1
-                time.sleep(5)  # Wait before retrying
+                    metrics.inc(PROCESSING_ERRORS)
+                self.stop_event.wait(5)  # Wait before retrying
+        
+        receiver.shutdown(wait=False)
     
-    def start_streaming(self, metrics: Optional[Dict[str, Any]] = None):
+    def _worker_loop(self):
+        """
+        Persistent worker thread body that waits for a start signal and runs
+        the streaming worker until it is stopped, once per start signal.
+        """
+        while True:
+            self._start_event.wait()
+            self._start_event.clear()
+            
+            future = self._run_future
+            if not future.set_running_or_notify_cancel():
+                continue
+            
+            try:
+                self.streaming_worker(self._run_metrics)
+            except Exception as e:
+                logger.error(f"Streaming worker failed: {e}")
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+    
+    def start_streaming(self, metrics: Optional[Counters] = None) -> Optional[Future]:
         """
         Start the streaming process.
         
         Args:
-            metrics: Optional dictionary to update with metrics
+            metrics: Optional counters to update with metrics
+            
+        Returns:
+            Future that completes when the run ends, raising any error that
+            stopped the worker, or None if streaming was already running or
+            the previous run has not stopped yet
         """
         if self.running:
             logger.warning("Streaming is already running")
-            return
+            return None
+        
+        # Clearing the stop event would resume a previous run still stopping
+        if self._run_future is not None and not self._run_future.done():
+            logger.warning("Previous streaming run has not stopped yet")
+            return None
         
         self.stop_event.clear()
         self.running = True
         
-        # Start the streaming worker in a separate thread
-        self.thread = threading.Thread(
-            target=self.streaming_worker,
-            args=(metrics,),
-            daemon=True
-        )
-        self.thread.start()
+        # Start the worker thread on first use, then signal it for each run
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._worker_loop, daemon=True)
+            self.thread.start()
+        
+        self._run_metrics = metrics
+        self._run_future = Future()
+        self._start_event.set()
         logger.info("Streaming process started")
+        return self._run_future
     
     def stop_streaming(self):
         """
         Stop the streaming process.
+        
+        Raises:
+            Exception: The error that stopped the streaming worker, if any
         """
         if not self.running:
             logger.warning("Streaming is not running")
@@ -160,12 +252,17 @@ class StreamProcessor:
         
         logger.info("Stopping streaming process")
         self.stop_event.set()
+        self.running = False
         
-        # Wait for the thread to finish
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=10)
+        # Wait for the current run to finish
+        try:
+            self._run_future.result(timeout=10)
+        except FutureTimeoutError:
+            logger.warning("Streaming worker did not stop within 10 seconds")
+        finally:
+            # Deliver the messages sent since the worker's last flush
+            self.kafka_connector.flush()
         
-        self.running = False
         logger.info("Streaming process stopped")
     
     def get_available_topics(self) -> List[str]:
@@ -175,14 +272,7 @@ class StreamProcessor:
         Returns:
             List of topic names
         """
-        try:
-            # Use the admin client to list topics
-            metadata = self.kafka_connector.admin_client.list_topics(timeout=10)
-            topics = list(metadata.topics.keys())
-            return topics
-        except Exception as e:
-            logger.error(f"Error getting topics: {e}")
-            return [KAFKA_TOPIC]  # Return default topic if listing fails
+        return self.kafka_connector.list_topics()
     
     @staticmethod
     def transform_message(message: Dict[str, Any]) -> Dict[str, Any]:
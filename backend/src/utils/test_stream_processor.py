@@ -14,6 +14,7 @@ from backend.src.config.test_config import (
     KAFKA_TOPIC, 
     SQS_SIMULATOR_QUEUE
 )
+from backend.src.utils.stream_processor import FLUSH_EVERY_BATCHES, FLUSH_INTERVAL_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -49,12 +50,17 @@ class TestStreamProcessor:
             'messages_per_second': 0
         }
         
-    def process_message(self, message: Dict[str, Any]) -> bool:
+        # Start of the current run as epoch seconds, for rate calculations
+        self._start_epoch: Optional[float] = None
+        
+    def process_message(self, message: Dict[str, Any], timestamp: Optional[str] = None) -> bool:
         """
         Process a single message from SQS and send it to Kafka.
         
         Args:
             message: Message from SQS
+            timestamp: ISO timestamp added to the message, usually shared by a
+                received batch. Defaults to now.
             
         Returns:
             True if processing was successful, False otherwise
@@ -67,7 +73,7 @@ class TestStreamProcessor:
             enriched_message = {
                 'message_id': message_id,
                 'source': 'sqs-simulator',
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp or datetime.now().isoformat(),
                 'data': body
             }
             
@@ -95,26 +101,35 @@ class TestStreamProcessor:
         Worker function that continuously processes messages from SQS to Kafka.
         """
         logger.info("Test streaming worker started")
-        self.metrics['start_time'] = datetime.now().isoformat()
+        self._start_epoch = time.time()
+        self.metrics['start_time'] = datetime.fromtimestamp(self._start_epoch).isoformat()
+        
+        batches_since_flush = 0
+        last_flush = time.monotonic()
         
         while not self.stop_event.is_set():
             try:
                 # Receive messages from SQS
-                start_time = time.time()
                 messages = self.sqs_connector.receive_messages(max_messages=10)
                 
+                # Messages of a batch share one timestamp, taken once per receive
+                batch_ts = datetime.now().isoformat() if messages else None
+                
+                # Receipt handles of the processed messages, deleted in one batch
+                successful_receipts = []
+                
                 # Process each message
                 for message in messages:
                     try:
-                        success = self.process_message(message)
+                        success = self.process_message(message, batch_ts)
                         
                         if success:
                             # Delete the message from SQS if processing was successful
-                            self.sqs_connector.delete_message(message['receipt_handle'])
+                            successful_receipts.append(message['receipt_handle'])
                             
                             # Update metrics
                             self.metrics['messages_processed'] += 1
-                            self.metrics['last_processing_time'] = datetime.now().isoformat()
+                            self.metrics['last_processing_time'] = batch_ts
                         else:
                             # Update error metrics
                             self.metrics['kafka_send_errors'] += 1
@@ -122,18 +137,25 @@ class TestStreamProcessor:
                         logger.error(f"Error in message processing loop: {e}")
                         self.metrics['processing_errors'] += 1
                 
-                # Ensure all messages are sent to Kafka
-                self.kafka_connector.flush()
+                if successful_receipts:
+                    self.sqs_connector.delete_messages(successful_receipts)
+                
+                # Flush periodically rather than after every receive; the
+                # connector's poll thread services delivery callbacks meanwhile
+                batches_since_flush += 1
+                now = time.monotonic()
+                if (batches_since_flush >= FLUSH_EVERY_BATCHES or
+                        now - last_flush >= FLUSH_INTERVAL_SECONDS):
+                    self.kafka_connector.flush()
+                    batches_since_flush = 0
+                    last_flush = now
                 
                 # Update performance metrics
                 if self.metrics['messages_processed'] > 0:
-                    current_time = datetime.now()
-                    if self.metrics['start_time']:
-                        start_time = datetime.fromisoformat(self.metrics['start_time'])
-                        time_diff = (current_time - start_time).total_seconds()
-                        if time_diff > 0:
-                            self.metrics['total_execution_time'] = time_diff
-                            self.metrics['messages_per_second'] = self.metrics['messages_processed'] / time_diff
+                    time_diff = time.time() - self._start_epoch
+                    if time_diff > 0:
+                        self.metrics['total_execution_time'] = time_diff
+                        self.metrics['messages_per_second'] = self.metrics['messages_processed'] / time_diff
                 
                 # If no messages were received, wait before polling again
                 if not messages:
@@ -163,6 +185,7 @@ class TestStreamProcessor:
             'total_execution_time': 0,
             'messages_per_second': 0
         }
+        self._start_epoch = None
         
         self.stop_event.clear()
         self.running = True
@@ -190,14 +213,16 @@ class TestStreamProcessor:
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=10)
         
+        # Deliver the messages sent since the worker's last flush
+        self.kafka_connector.flush()
+        
         self.running = False
-        self.metrics['end_time'] = datetime.now().isoformat()
+        end_epoch = time.time()
+        self.metrics['end_time'] = datetime.fromtimestamp(end_epoch).isoformat()
         
         # Calculate final metrics
-        if self.metrics['start_time'] and self.metrics['end_time']:
-            start_time = datetime.fromisoformat(self.metrics['start_time'])
-            end_time = datetime.fromisoformat(self.metrics['end_time'])
-            time_diff = (end_time - start_time).total_seconds()
+        if self._start_epoch is not None:
+            time_diff = end_epoch - self._start_epoch
             self.metrics['total_execution_time'] = time_diff
             if self.metrics['messages_processed'] > 0 and time_diff > 0:
                 self.metrics['messages_per_second'] = self.metrics['messages_processed'] / time_diff
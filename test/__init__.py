@@ -0,0 +1,3 @@
+"""
+Tests for the data streaming application.
+"""
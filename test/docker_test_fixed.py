@@ -22,6 +22,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'test-data'))
 from data_generator import TestDataGenerator
 
 # Import connectors
+from confluent_kafka import Producer
 from backend.src.connectors.sqs_simulator_connector import SQSSimulatorConnector
 from backend.src.connectors.kafka_connector import KafkaConnector
 
@@ -33,14 +34,15 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def test_sqs_simulator():
+def test_sqs_simulator(producer=None):
     """Test the SQS Simulator with a real Kafka cluster."""
     logger.info("Testing SQS Simulator with real Kafka cluster")
     
     # Create SQS Simulator with Kafka at localhost (using port 29092 for Docker mapping)
     sqs = SQSSimulatorConnector(
         queue_name="test-queue",
-        bootstrap_servers="localhost:29092"
+        bootstrap_servers="localhost:29092",
+        producer=producer
     )
     
     # Generate test data
@@ -49,45 +51,46 @@ def test_sqs_simulator():
         count=5
     )
     
-    message_ids = []
-    
     # Send messages
     logger.info(f"Sending {len(test_data)} messages to SQS Simulator")
-    for message in test_data:
-        message_id = sqs.send_message(message)
-        message_ids.append(message_id)
-        logger.info(f"Sent message with ID: {message_id}")
-    
-    # Wait for messages to be processed
-    time.sleep(2)
+    message_ids = [message_id for message_id in sqs.send_messages(test_data) if message_id]
+    if message_ids:
+        logger.info(f"Sent {len(message_ids)} messages, IDs {message_ids[0]}..{message_ids[-1]}")
+    else:
+        logger.error("Failed to send any messages")
     
-    # Receive messages
+    # Receive messages, polling until all sent messages arrive or 5 seconds pass
     logger.info("Receiving messages from SQS Simulator")
-    received_messages = sqs.receive_messages(max_messages=10, wait_time=5)
+    received_messages = []
+    deadline = time.monotonic() + 5
+    while len(received_messages) < len(message_ids) and time.monotonic() < deadline:
+        received_messages.extend(sqs.receive_messages(max_messages=10, wait_time=0.1))
     
     logger.info(f"Received {len(received_messages)} messages")
-    for message in received_messages:
-        logger.info(f"Message ID: {message['message_id']}")
-        
-        # Delete the message
-        receipt_handle = message['receipt_handle']
-        result = sqs.delete_message(receipt_handle)
-        if result:
-            logger.info(f"Deleted message with receipt handle: {receipt_handle[:20]}...")
-        else:
-            logger.error(f"Failed to delete message with receipt handle: {receipt_handle[:20]}...")
+    if logger.isEnabledFor(logging.DEBUG):
+        for message in received_messages:
+            logger.debug("Message ID: %s", message['message_id'])
+    
+    # Delete the messages
+    receipt_handles = [message['receipt_handle'] for message in received_messages]
+    results = sqs.delete_messages(receipt_handles)
+    logger.info(f"Deleted {sum(results)} of {len(receipt_handles)} messages")
+    for receipt_handle, result in zip(receipt_handles, results):
+        if not result:
+            logger.error("Failed to delete message with receipt handle: %s...", receipt_handle[:20])
     
     return len(message_ids), len(received_messages)
 
 
-def test_kafka_connector():
+def test_kafka_connector(producer=None):
     """Test the Kafka Connector with a real Kafka cluster."""
     logger.info("Testing Kafka Connector with real Kafka cluster")
     
     # Create Kafka Connector
     kafka = KafkaConnector(
         bootstrap_servers="localhost:29092",
-        topic="test-topic"
+        topic="test-topic",
+        producer=producer
     )
     
     # Generate test data
@@ -98,30 +101,44 @@ def test_kafka_connector():
     
     # Send messages
     logger.info(f"Sending {len(test_data)} messages to Kafka")
-    for i, message in enumerate(test_data):
-        key = f"test-key-{i}"
-        result = kafka.send_message(message, key=key)
-        if result:
-            logger.info(f"Sent message with key: {key}")
-        else:
-            logger.error(f"Failed to send message with key: {key}")
+    failed = 0
+    
+    def on_delivery(err, msg):
+        nonlocal failed
+        if err is not None:
+            failed += 1
+            logger.error("Failed to deliver message with key %s: %s", msg.key(), err)
+    
+    # Queue all messages, then wait for their delivery reports at once
+    sent = kafka.send_messages(
+        ((f"test-key-{i}", message, None) for i, message in enumerate(test_data)),
+        on_delivery=on_delivery
+    )
+    if sent < len(test_data):
+        logger.error(f"Failed to send {len(test_data) - sent} messages")
     
     # Flush to ensure messages are delivered
     kafka.flush()
     
-    return len(test_data)
+    return sent - failed
 
 
 if __name__ == "__main__":
     logger.info("Starting Docker test")
     
     try:
+        # Both tests send through one producer, so the cluster is bootstrapped once
+        producer = Producer({
+            'bootstrap.servers': "localhost:29092",
+            'linger.ms': 5
+        })
+        
         # Test SQS Simulator
-        sent_count, received_count = test_sqs_simulator()
+        sent_count, received_count = test_sqs_simulator(producer)
         logger.info(f"SQS Simulator test complete - Sent: {sent_count}, Received: {received_count}")
         
         # Test Kafka Connector
-        sent_to_kafka = test_kafka_connector()
+        sent_to_kafka = test_kafka_connector(producer)
         logger.info(f"Kafka Connector test complete - Sent: {sent_to_kafka}")
         
         # Overall result
@@ -11,29 +11,74 @@ This script orchestrates the complete end-to-end testing process:
 import argparse
 import logging
 import os
+import socket
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Tuple
 
 # Add project root to Python path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 # Add test-data folder to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'test-data'))
+TEST_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'test-data'))
+if TEST_DATA_DIR not in sys.path:
+    sys.path.insert(0, TEST_DATA_DIR)
 
 from test.test_sqs_simulator_connector import SQSSimulatorTest
 from test.test_kafka_connector import KafkaConnectorTest
 from test.test_stream_processor import StreamProcessorTest
 from data_generator import TestDataGenerator
 
-# Configure logging
+# Configure logging, replacing the configuration of the imported test modules
+# so the lines of concurrently running tests show their thread
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(message)s',
+    force=True
 )
 logger = logging.getLogger(__name__)
 
+# How long to wait at exit for the Kafka cluster teardown to finish
+KAFKA_STOP_TIMEOUT_SECONDS = 30
+
+# How often and how long to wait for the Kafka broker to accept connections
+KAFKA_READY_POLL_SECONDS = 0.1
+KAFKA_READY_TIMEOUT_SECONDS = 30
+
+def _wait_for_kafka(bootstrap_servers: str, timeout: float = KAFKA_READY_TIMEOUT_SECONDS) -> bool:
+    """
+    Wait until a Kafka bootstrap server accepts TCP connections.
+    
+    Args:
+        bootstrap_servers: Comma-separated host:port list of Kafka bootstrap servers
+        timeout: Maximum time to wait in seconds
+        
+    Returns:
+        True if a broker accepted a connection in time, False otherwise
+    """
+    addresses = []
+    for server in bootstrap_servers.split(','):
+        host, _, port = server.strip().rpartition(':')
+        addresses.append((host, int(port)))
+    
+    deadline = time.monotonic() + timeout
+    while True:
+        for address in addresses:
+            try:
+                with socket.create_connection(address, timeout=0.2):
+                    return True
+            except OSError:
+                pass
+        
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(KAFKA_READY_POLL_SECONDS)
+
 class EndToEndTestRunner:
     """
     Orchestrates the end-to-end test process for the streaming application.
@@ -66,6 +111,36 @@ class EndToEndTestRunner:
         # Test results tracking
         self.test_results = {}
         
+        # Thread stopping the Kafka cluster after the tests
+        self._stop_thread = None
+        
+    def _run_docker_compose(self, *args: str) -> bool:
+        """
+        Run a Docker Compose command, logging its output as it is written.
+        
+        Args:
+            args: Docker Compose command and arguments
+            
+        Returns:
+            True if the command succeeded, False otherwise
+        """
+        process = subprocess.Popen(
+            ["docker-compose", "-f", self.docker_compose_file, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True
+        )
+        
+        with process.stdout:
+            for line in process.stdout:
+                logger.info("Docker Compose: %s", line.rstrip())
+        
+        returncode = process.wait()
+        if returncode != 0:
+            logger.error(f"Docker Compose command '{' '.join(args)}' exited with status {returncode}")
+            return False
+        return True
+        
     def start_kafka_cluster(self) -> bool:
         """
         Start the Kafka cluster using Docker Compose.
@@ -79,25 +154,17 @@ class EndToEndTestRunner:
             
         logger.info(f"Starting Kafka cluster using Docker Compose file: {self.docker_compose_file}")
         
-        try:
-            result = subprocess.run(
-                ["docker-compose", "-f", self.docker_compose_file, "up", "-d"],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            logger.info(f"Docker Compose output: {result.stdout}")
-            
-            # Wait for Kafka to become available
-            logger.info("Waiting for Kafka cluster to become available...")
-            time.sleep(10)  # Adjust based on startup time requirements
-            
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to start Kafka cluster: {e}")
-            logger.error(f"Docker Compose error output: {e.stderr}")
+        if not self._run_docker_compose("up", "-d"):
+            logger.error("Failed to start Kafka cluster")
+            return False
+        
+        # Wait for Kafka to become available, polling instead of a fixed sleep
+        logger.info("Waiting for Kafka cluster to become available...")
+        if not _wait_for_kafka(self.bootstrap_servers):
+            logger.error(f"Kafka did not become available within {KAFKA_READY_TIMEOUT_SECONDS} seconds")
             return False
+        
+        return True
     
     def stop_kafka_cluster(self) -> bool:
         """
@@ -112,20 +179,37 @@ class EndToEndTestRunner:
             
         logger.info("Stopping Kafka cluster...")
         
-        try:
-            result = subprocess.run(
-                ["docker-compose", "-f", self.docker_compose_file, "down"],
-                check=True,
-                capture_output=True,
-                text=True
-            )
+        if not self._run_docker_compose("down"):
+            logger.error("Failed to stop Kafka cluster")
+            return False
+        
+        return True
+    
+    def _stop_kafka_cluster_in_background(self):
+        """
+        Stop the Kafka cluster and record the result.
+        """
+        self.test_results["kafka_cluster_stop"] = self.stop_kafka_cluster()
+    
+    def wait_for_kafka_cluster_stop(self, timeout: float = KAFKA_STOP_TIMEOUT_SECONDS) -> bool:
+        """
+        Wait for a Kafka cluster stop started by run_all_tests to finish.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
             
-            logger.info(f"Docker Compose output: {result.stdout}")
+        Returns:
+            True if the cluster was stopped or no stop was started, False
+            if the stop failed or did not finish in time
+        """
+        if self._stop_thread is None:
             return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to stop Kafka cluster: {e}")
-            logger.error(f"Docker Compose error output: {e.stderr}")
+        
+        self._stop_thread.join(timeout)
+        if self._stop_thread.is_alive():
+            logger.error(f"Kafka cluster did not stop within {timeout} seconds")
             return False
+        return bool(self.test_results.get("kafka_cluster_stop"))
     
     def check_kafka_status(self) -> bool:
         """
@@ -174,29 +258,35 @@ class EndToEndTestRunner:
         """
         Run individual component tests.
         
+        The tests use separate topics, so they run concurrently.
+        
         Returns:
             Dictionary with test results
         """
         logger.info("=== Running Component Tests ===")
-        results = {}
         
-        # Test SQS Simulator
-        logger.info("Running SQS Simulator tests...")
         sqs_test = SQSSimulatorTest(
             bootstrap_servers=self.bootstrap_servers,
             queue_name=self.sqs_queue
         )
-        results["sqs_simulator"] = sqs_test.run_all_tests()
-        
-        # Test Kafka Connector
-        logger.info("Running Kafka Connector tests...")
         kafka_test = KafkaConnectorTest(
             bootstrap_servers=self.bootstrap_servers,
             topic=self.kafka_topic
         )
-        results["kafka_connector"] = kafka_test.run_all_tests()
         
-        return results
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='component-test') as executor:
+            # Test SQS Simulator
+            logger.info("Running SQS Simulator tests...")
+            sqs_future = executor.submit(sqs_test.run_all_tests)
+            
+            # Test Kafka Connector
+            logger.info("Running Kafka Connector tests...")
+            kafka_future = executor.submit(kafka_test.run_all_tests)
+            
+            return {
+                "sqs_simulator": sqs_future.result(),
+                "kafka_connector": kafka_future.result()
+            }
     
     def run_stream_processor_test(self) -> bool:
         """
@@ -255,6 +345,7 @@ class EndToEndTestRunner:
         
         # Check if component tests were successful
         component_success = all(component_results.values())
+        self.test_results["component_success"] = component_success
         
         if not component_success:
             logger.warning("Some component tests failed, but continuing with stream processor test")
@@ -263,17 +354,19 @@ class EndToEndTestRunner:
         stream_processor_success = self.run_stream_processor_test()
         self.test_results["stream_processor_test"] = stream_processor_success
         
-        # Step 6: Stop Kafka cluster
-        kafka_stopped = self.stop_kafka_cluster()
-        self.test_results["kafka_cluster_stop"] = kafka_stopped
+        # Step 6: Stop Kafka cluster in the background, so the results are
+        # reported while it shuts down; callers wait for it with
+        # wait_for_kafka_cluster_stop()
+        self.test_results["kafka_cluster_stop"] = None
+        self._stop_thread = threading.Thread(target=self._stop_kafka_cluster_in_background, daemon=True)
+        self._stop_thread.start()
         
         # Determine overall success
         overall_success = (
             kafka_started and 
             kafka_healthy and 
             component_success and 
-            stream_processor_success and 
-            kafka_stopped
+            stream_processor_success
         )
         
         # Print summary
@@ -296,7 +389,10 @@ class EndToEndTestRunner:
         
         logger.info(f"Kafka Cluster Start: {'✅' if kafka_start else '❌'}")
         logger.info(f"Kafka Health Check: {'✅' if kafka_health else '❌'}")
-        logger.info(f"Kafka Cluster Stop: {'✅' if kafka_stop else '❌'}")
+        if kafka_stop is None:
+            logger.info("Kafka Cluster Stop: in progress")
+        else:
+            logger.info(f"Kafka Cluster Stop: {'✅' if kafka_stop else '❌'}")
         
         # Test data generation
         data_gen = self.test_results.get("test_data_generation", False)
@@ -304,6 +400,7 @@ class EndToEndTestRunner:
         
         # Component tests
         component_tests = self.test_results.get("component_tests", {})
+        component_success = self.test_results.get("component_success", False)
         logger.info("Component Tests:")
         for component, result in component_tests.items():
             logger.info(f"  - {component}: {'✅' if result else '❌'}")
@@ -316,9 +413,8 @@ class EndToEndTestRunner:
         overall_success = (
             kafka_start and 
             kafka_health and 
-            all(component_tests.values()) and 
-            stream_test and 
-            kafka_stop
+            component_success and 
+            stream_test
         )
         
         logger.info(f"Overall Result: {'✅ PASSED' if overall_success else '❌ FAILED'}")
@@ -377,5 +473,8 @@ if __name__ == "__main__":
     
     success, _ = runner.run_all_tests()
     
+    # A failed or hung Kafka cluster stop fails the run as well
+    stopped = runner.wait_for_kafka_cluster_stop()
+    
     # Set exit code based on test result
-    sys.exit(0 if success else 1)
+    sys.exit(0 if success and stopped else 1)
@@ -6,11 +6,14 @@ import logging
 import sys
 import os
 import time
-import uuid
-from typing import Dict, Any, List, Optional
+import secrets
+from collections import deque
+from typing import Deque, Dict, Any
 import unittest
 from unittest.mock import MagicMock, patch
 
+import orjson
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,50 +35,47 @@ class SimpleSQSSimulator:
     """Simple SQS simulator for testing."""
     
     def __init__(self):
-        self.messages = []
+        # Messages by ID, and the IDs of messages not yet received in send order
+        self._store: Dict[str, Dict[str, Any]] = {}
+        self._pending: Deque[str] = deque()
         self.receipt_handles = {}
         
     def send_message(self, message_body):
         """Send a message to the queue."""
-        message_id = str(uuid.uuid4())
-        self.messages.append({
+        message_id = secrets.token_hex(16)
+        self._store[message_id] = {
             'message_id': message_id,
             'body': message_body,
-            'receipt_handle': f"receipt-{message_id}",
             'timestamp': time.time()
-        })
+        }
+        self._pending.append(message_id)
         return message_id
         
     def receive_messages(self, max_messages=10):
         """Receive messages from the queue."""
         result = []
-        count = 0
-        
-        for msg in self.messages[:]:
-            if count >= max_messages:
-                break
-                
-            # Only return messages that don't have active receipt handles
-            receipt_handle = f"receipt-{msg['message_id']}"
-            if receipt_handle not in self.receipt_handles:
-                self.receipt_handles[receipt_handle] = msg
-                result.append({
-                    'message_id': msg['message_id'],
-                    'body': msg['body'],
-                    'receipt_handle': receipt_handle
-                })
-                count += 1
+        pending = self._pending
+        
+        # Received messages have active receipt handles and are not returned again
+        while pending and len(result) < max_messages:
+            msg = self._store[pending.popleft()]
+            receipt_handle = "receipt-" + msg['message_id']
+            self.receipt_handles[receipt_handle] = msg
+            result.append({
+                'message_id': msg['message_id'],
+                'body': msg['body'],
+                'receipt_handle': receipt_handle
+            })
                 
         return result
         
     def delete_message(self, receipt_handle):
         """Delete a message from the queue."""
-        if receipt_handle in self.receipt_handles:
-            msg = self.receipt_handles[receipt_handle]
-            self.messages.remove(msg)
-            del self.receipt_handles[receipt_handle]
-            return True
-        return False
+        msg = self.receipt_handles.pop(receipt_handle, None)
+        if msg is None:
+            return False
+        del self._store[msg['message_id']]
+        return True
 
 # Create a simplified version of the Kafka connector
 class SimpleKafkaConnector:
@@ -86,9 +86,9 @@ class SimpleKafkaConnector:
         self.topics = set(["test-topic"])
         
     def send_message(self, message, key=None):
-        """Send a message to Kafka."""
+        """Send a message to Kafka, keeping only its JSON-encoded bytes."""
         self.messages.append({
-            'message': message,
+            'payload': orjson.dumps(message),
             'key': key,
             'timestamp': time.time()
         })
@@ -103,6 +103,17 @@ class SimpleKafkaConnector:
         self.topics.add(topic)
         return True
 
+# Second and formatted local time of the last message timestamp
+_TS_CACHE = (0, "")
+
+def _timestamp():
+    """Format the current local time, reformatting at most once per second."""
+    global _TS_CACHE
+    now = int(time.time())
+    if now != _TS_CACHE[0]:
+        _TS_CACHE = (now, time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now)))
+    return _TS_CACHE[1]
+
 # Create a simplified version of the Stream Processor
 class SimpleStreamProcessor:
     """Simple stream processor for testing."""
@@ -123,7 +134,7 @@ class SimpleStreamProcessor:
         try:
             enriched_message = {
                 'message_id': message['message_id'],
-                'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                'timestamp': _timestamp(),
                 'data': message['body']
             }
             
@@ -160,6 +171,11 @@ class SimpleStreamProcessor:
 class TestSimpleSQSSimulator(unittest.TestCase):
     """Test the simple SQS simulator."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Generate the test messages once for all tests."""
+        cls._messages = [TestDataGenerator.generate_simple_message() for _ in range(2)]
+        
     def setUp(self):
         """Set up the test."""
         self.sqs = SimpleSQSSimulator()
@@ -167,8 +183,7 @@ class TestSimpleSQSSimulator(unittest.TestCase):
     def test_send_receive_delete(self):
         """Test sending, receiving, and deleting messages."""
         # Send messages
-        message1 = TestDataGenerator.generate_simple_message()
-        message2 = TestDataGenerator.generate_simple_message()
+        message1, message2 = self._messages
         
         msg_id1 = self.sqs.send_message(message1)
         msg_id2 = self.sqs.send_message(message2)
@@ -200,13 +215,18 @@ class TestSimpleSQSSimulator(unittest.TestCase):
 class TestSimpleKafkaConnector(unittest.TestCase):
     """Test the simple Kafka connector."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Generate the test message once for all tests."""
+        cls._message = generate_test_message()
+        
     def setUp(self):
         """Set up the test."""
         self.kafka = SimpleKafkaConnector()
         
     def test_send_message(self):
         """Test sending a message."""
-        message = generate_test_message()
+        message = self._message
         
         result = self.kafka.send_message(message)
         self.assertTrue(result)
@@ -220,7 +240,7 @@ class TestSimpleKafkaConnector(unittest.TestCase):
         
     def test_flush(self):
         """Test flushing the producer."""
-        message = generate_test_message()
+        message = self._message
         
         self.kafka.send_message(message)
         self.kafka.send_message(message)
@@ -237,6 +257,11 @@ class TestSimpleKafkaConnector(unittest.TestCase):
 class TestSimpleStreamProcessor(unittest.TestCase):
     """Test the simple stream processor."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Generate the test message body once for all tests."""
+        cls._body = TestDataGenerator.generate_simple_message()
+        
     def setUp(self):
         """Set up the test."""
         self.sqs = SimpleSQSSimulator()
@@ -248,7 +273,7 @@ class TestSimpleStreamProcessor(unittest.TestCase):
         # Create a test message based on our data generator
         message = {
             'message_id': 'test-id',
-            'body': TestDataGenerator.generate_simple_message(),
+            'body': self._body,
             'receipt_handle': 'test-receipt'
         }
         
@@ -262,7 +287,7 @@ class TestSimpleStreamProcessor(unittest.TestCase):
         
         # Check Kafka message
         self.assertEqual(len(self.kafka.messages), 1)
-        kafka_msg = self.kafka.messages[0]['message']
+        kafka_msg = orjson.loads(self.kafka.messages[0]['payload'])
         self.assertEqual(kafka_msg['message_id'], 'test-id')
         # Just verify that data is present - exact content will vary based on TestDataGenerator
         self.assertIn('data', kafka_msg)
@@ -289,6 +314,11 @@ class TestSimpleStreamProcessor(unittest.TestCase):
 class TestEndToEndFlow(unittest.TestCase):
     """Test the end-to-end flow."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Generate the test messages once for all tests."""
+        cls._messages = [TestDataGenerator.generate_simple_message() for _ in range(5)]
+        
     def setUp(self):
         """Set up the test."""
         self.sqs = SimpleSQSSimulator()
@@ -298,8 +328,7 @@ class TestEndToEndFlow(unittest.TestCase):
     def test_end_to_end(self):
         """Test the end-to-end flow."""
         # Send test messages to SQS
-        for _ in range(5):
-            message = TestDataGenerator.generate_simple_message()
+        for message in self._messages:
             self.sqs.send_message(message)
         
         # Start streaming
@@ -2,12 +2,144 @@
 Test Data Generator for the data streaming application.
 Generates various types of test data for unit and integration testing.
 """
-import json
 import random
+import secrets
 import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from functools import partial
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import orjson
+
+_EVENT_TYPES = (
+    "login", "logout", "purchase", "page_view",
+    "click", "signup", "account_update", "settings_change"
+)
+_PLATFORMS = ("web", "ios", "android", "desktop")
+_BROWSERS = ("chrome", "firefox", "safari", "edge", None)
+_COUNTRIES = ("US", "UK", "CA", "AU", "DE", "FR", "JP", "IN")
+_PAYMENT_METHODS = ("credit_card", "paypal", "apple_pay", "google_pay")
+
+# Data types generated by generate_batch, in the order mixed data splits them
+_DATA_TYPES = ("user_event", "sensor_data", "log_entry")
+
+_SENSOR_TYPES = ("temperature", "humidity", "pressure", "light", "motion", "air_quality")
+_SENSOR_LOCATIONS = ("room_1", "room_2", "kitchen", "living_room", "outdoor", "basement")
+
+# Base values for different sensor types
+_BASE_VALUES = {
+    "temperature": 21.0,  # Celsius
+    "humidity": 45.0,     # Percentage
+    "pressure": 1013.0,   # hPa
+    "light": 450.0,       # Lux
+    "motion": 0.0,        # Binary
+    "air_quality": 50.0   # AQI
+}
+
+# Variation ranges for different sensor types
+_VARIATIONS = {
+    "temperature": 10.0,
+    "humidity": 20.0,
+    "pressure": 10.0,
+    "light": 200.0,
+    "motion": 1.0,
+    "air_quality": 30.0
+}
+
+# Units of the readings of different sensor types
+_SENSOR_UNITS = {
+    "temperature": "celsius",
+    "humidity": "percent",
+    "pressure": "hPa",
+    "light": "lux",
+    "motion": "binary",
+    "air_quality": "aqi"
+}
+
+_LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+# Cumulative weights of the log levels (0.4, 0.3, 0.2, 0.08, 0.02), making
+# critical errors less common
+_LOG_LEVEL_CUM_WEIGHTS = (0.4, 0.7, 0.9, 0.98, 1.0)
+_SERVICES = ("api", "auth", "database", "frontend", "backend", "worker", "scheduler")
+_ERROR_TYPES = ("ValidationError", "AuthenticationError", "DatabaseError", "TimeoutError", "InternalServerError")
+
+# Realistic looking log messages for each log level
+_MESSAGES_BY_LEVEL = {
+    "DEBUG": (
+        "Initializing component",
+        "Processing request parameters",
+        "Cache hit for key",
+        "Retrieved 23 records from database",
+        "API response received in 127ms",
+        "Connection established to service",
+        "Thread pool status: 4/10 active"
+    ),
+    "INFO": (
+        "User successfully authenticated",
+        "Payment processed successfully",
+        "New account created",
+        "Email notification sent",
+        "Database migration completed",
+        "Scheduled task started",
+        "API request completed successfully"
+    ),
+    "WARNING": (
+        "Rate limit threshold approaching",
+        "Database connection pool running low",
+        "API endpoint deprecated, please upgrade",
+        "High memory usage detected",
+        "Slow query execution (>500ms)",
+        "Retrying failed operation (attempt 2/3)",
+        "Cache miss rate above normal"
+    ),
+    "ERROR": (
+        "Failed to connect to database",
+        "API request timeout after 30s",
+        "Payment processing failed",
+        "Unable to send email notification",
+        "Invalid authentication token",
+        "Database query execution error",
+        "Service dependency unavailable"
+    ),
+    "CRITICAL": (
+        "System is out of disk space",
+        "Database connection pool exhausted",
+        "Fatal exception in main application thread",
+        "Security breach detected",
+        "Data corruption detected",
+        "Unrecoverable system state",
+        "Emergency shutdown initiated"
+    )
+}
+
+# Realistic looking stack traces
+_STACK_TRACES = (
+    """Traceback (most recent call last):
+  File "/app/services/api.py", line 142, in process_request
+    result = database.execute_query(query)
+  File "/app/database/client.py", line 85, in execute_query
+    connection = self.get_connection()
+  File "/app/database/client.py", line 32, in get_connection
+    return self.connection_pool.acquire()
+  File "/app/database/pool.py", line 67, in acquire
+    raise DatabaseError("Connection pool exhausted")
+DatabaseError: Connection pool exhausted""",
+
+    """Traceback (most recent call last):
+  File "/app/workers/processor.py", line 78, in run
+    message = self.queue.get(timeout=5)
+  File "/usr/local/lib/python3.9/queue.py", line 178, in get
+    raise Empty
+EmptyQueueError: Timeout waiting for queue message""",
+
+    """Traceback (most recent call last):
+  File "/app/auth/jwt.py", line 56, in validate_token
+    decoded = jwt.decode(token, self.secret_key, algorithms=["HS256"])
+  File "/usr/local/lib/python3.9/site-packages/jwt/api_jwt.py", line 112, in decode
+    raise InvalidTokenError("Signature verification failed")
+jwt.exceptions.InvalidTokenError: Signature verification failed"""
+)
 
 class TestDataGenerator:
     """
@@ -15,193 +147,223 @@ class TestDataGenerator:
     """
     
     @staticmethod
-    def generate_user_event() -> Dict[str, Any]:
+    def generate_user_event(timestamp: Optional[str] = None,
+                            picks: Optional[Tuple[str, str, Optional[str], str]] = None) -> Dict[str, Any]:
         """
         Generate a sample user event for testing.
         
+        Args:
+            timestamp: ISO timestamp of the event, usually shared by a
+                generated batch. Defaults to now.
+            picks: Event type, platform, browser and country of the event,
+                usually drawn for a whole batch. Drawn here by default.
+            
         Returns:
             Dict: A dictionary containing user event data
         """
-        event_types = [
-            "login", "logout", "purchase", "page_view", 
-            "click", "signup", "account_update", "settings_change"
-        ]
+        choice = random.choice
+        randint = random.randint
+        randrange = random.randrange
+        rand = random.random
+        uniform = random.uniform
+        uuid4 = uuid.uuid4
+        token_hex = secrets.token_hex
+        
+        if picks is not None:
+            event_type, platform, browser, country = picks
+        else:
+            event_type = choice(_EVENT_TYPES)
+            platform = choice(_PLATFORMS)
+            browser = choice(_BROWSERS)
+            country = choice(_COUNTRIES)
         
-        platforms = ["web", "ios", "android", "desktop"]
-        browsers = ["chrome", "firefox", "safari", "edge", None]
-        countries = ["US", "UK", "CA", "AU", "DE", "FR", "JP", "IN"]
+        user_id = f"user_{token_hex(4)}"
+        session_id = f"session_{token_hex(16)}"
         
-        user_id = f"user_{uuid.uuid4().hex[:8]}"
-        session_id = f"session_{uuid.uuid4().hex}"
+        # Both variable octets of the IP address come from one draw
+        ip_high, ip_low = divmod(randrange(254 * 254), 254)
         
         event = {
-            "event_id": str(uuid.uuid4()),
-            "event_type": random.choice(event_types),
-            "timestamp": datetime.now().isoformat(),
+            "event_id": str(uuid4()),
+            "event_type": event_type,
+            "timestamp": timestamp or datetime.now().isoformat(),
             "user_id": user_id,
             "session_id": session_id,
-            "platform": random.choice(platforms),
-            "browser": random.choice(browsers) if random.random() > 0.3 else None,
-            "country": random.choice(countries),
-            "ip_address": f"192.168.{random.randint(1, 254)}.{random.randint(1, 254)}",
-            "device_id": f"device_{uuid.uuid4().hex[:10]}",
+            "platform": platform,
+            "browser": browser if rand() > 0.3 else None,
+            "country": country,
+            "ip_address": f"192.168.{ip_high + 1}.{ip_low + 1}",
+            "device_id": f"device_{token_hex(5)}",
             "data": {
-                "page": f"/page_{random.randint(1, 100)}",
-                "referrer": f"/page_{random.randint(1, 100)}" if random.random() > 0.5 else None,
-                "duration_sec": random.randint(5, 300) if random.random() > 0.3 else None,
-                "successful": random.random() > 0.1
+                "page": f"/page_{randint(1, 100)}",
+                "referrer": f"/page_{randint(1, 100)}" if rand() > 0.5 else None,
+                "duration_sec": randint(5, 300) if rand() > 0.3 else None,
+                "successful": rand() > 0.1
             }
         }
         
         # Add some purchase-specific data if it's a purchase event
         if event["event_type"] == "purchase":
             event["data"]["transaction"] = {
-                "transaction_id": f"tx_{uuid.uuid4().hex[:10]}",
-                "amount": round(random.uniform(10, 1000), 2),
+                "transaction_id": f"tx_{token_hex(5)}",
+                "amount": round(uniform(10, 1000), 2),
                 "currency": "USD",
-                "items": random.randint(1, 10),
-                "payment_method": random.choice(["credit_card", "paypal", "apple_pay", "google_pay"])
+                "items": randint(1, 10),
+                "payment_method": choice(_PAYMENT_METHODS)
             }
             
         return event
     
     @staticmethod
-    def generate_sensor_data() -> Dict[str, Any]:
+    def generate_sensor_data(timestamp: Optional[str] = None, now: Optional[datetime] = None,
+                             reading: Optional[Tuple[str, float]] = None) -> Dict[str, Any]:
         """
         Generate sample IoT sensor data for testing.
         
+        Args:
+            timestamp: ISO timestamp of the reading, usually shared by a
+                generated batch. Defaults to now.
+            now: Time the metadata dates are relative to. Defaults to now.
+            reading: Sensor type and value of the reading, usually drawn for
+                a whole batch by generate_sensor_values_bulk. Drawn here by
+                default.
+            
         Returns:
             Dict: A dictionary containing sensor data
         """
-        sensor_types = ["temperature", "humidity", "pressure", "light", "motion", "air_quality"]
-        locations = ["room_1", "room_2", "kitchen", "living_room", "outdoor", "basement"]
-        
-        sensor_id = f"sensor_{random.randint(1000, 9999)}"
-        device_id = f"device_{random.randint(100, 999)}"
-        
-        # Base values for different sensor types
-        base_values = {
-            "temperature": 21.0,  # Celsius
-            "humidity": 45.0,     # Percentage
-            "pressure": 1013.0,   # hPa
-            "light": 450.0,       # Lux
-            "motion": 0.0,        # Binary
-            "air_quality": 50.0   # AQI
-        }
+        choice = random.choice
+        randint = random.randint
+        rand = random.random
+        uuid4 = uuid.uuid4
         
-        # Variation ranges for different sensor types
-        variations = {
-            "temperature": 10.0,
-            "humidity": 20.0,
-            "pressure": 10.0,
-            "light": 200.0,
-            "motion": 1.0,
-            "air_quality": 30.0
-        }
-        
-        # Choose a sensor type
-        sensor_type = random.choice(sensor_types)
+        # One timestamp serves the reading and its metadata dates
+        if now is None:
+            now = datetime.now()
         
-        # Generate value with some randomness around the base
-        base = base_values[sensor_type]
-        variation = variations[sensor_type]
-        value = base + (random.random() * 2 - 1) * variation
+        sensor_id = f"sensor_{randint(1000, 9999)}"
+        device_id = f"device_{randint(100, 999)}"
         
-        # For motion, make it binary (0 or 1)
-        if sensor_type == "motion":
-            value = 1 if random.random() > 0.7 else 0
+        if reading is not None:
+            sensor_type, value = reading
+        else:
+            # Choose a sensor type
+            sensor_type = choice(_SENSOR_TYPES)
+            
+            # Generate value with some randomness around the base
+            base = _BASE_VALUES[sensor_type]
+            variation = _VARIATIONS[sensor_type]
+            value = base + (rand() * 2 - 1) * variation
+            
+            # For motion, make it binary (0 or 1)
+            if sensor_type == "motion":
+                value = 1 if rand() > 0.7 else 0
         
         # Create the sensor reading
         data = {
-            "reading_id": str(uuid.uuid4()),
+            "reading_id": str(uuid4()),
             "sensor_id": sensor_id,
             "device_id": device_id,
             "sensor_type": sensor_type,
-            "timestamp": datetime.now().isoformat(),
-            "location": random.choice(locations),
+            "timestamp": timestamp or now.isoformat(),
+            "location": choice(_SENSOR_LOCATIONS),
             "value": round(value, 2),
-            "unit": self._get_unit_for_sensor_type(sensor_type),
-            "battery_level": random.randint(1, 100) if random.random() > 0.2 else None,
+            "unit": _SENSOR_UNITS.get(sensor_type, "unknown"),
+            "battery_level": randint(1, 100) if rand() > 0.2 else None,
             "metadata": {
-                "firmware_version": f"{random.randint(1, 5)}.{random.randint(0, 9)}.{random.randint(0, 9)}",
-                "installation_date": (datetime.now() - timedelta(days=random.randint(1, 500))).strftime("%Y-%m-%d"),
-                "last_maintenance": (datetime.now() - timedelta(days=random.randint(0, 90))).strftime("%Y-%m-%d") if random.random() > 0.3 else None
+                "firmware_version": f"{randint(1, 5)}.{randint(0, 9)}.{randint(0, 9)}",
+                "installation_date": (now - timedelta(days=randint(1, 500))).strftime("%Y-%m-%d"),
+                "last_maintenance": (now - timedelta(days=randint(0, 90))).strftime("%Y-%m-%d") if rand() > 0.3 else None
             }
         }
         
         return data
     
     @staticmethod
-    def _get_unit_for_sensor_type(sensor_type: str) -> str:
+    def generate_sensor_values_bulk(count: int) -> Tuple[List[str], List[float]]:
         """
-        Get the appropriate unit for a sensor type.
+        Draw the sensor types and values of count readings at once.
         
         Args:
-            sensor_type: Type of the sensor
+            count: Number of readings
             
         Returns:
-            str: The appropriate unit
+            Tuple: The sensor types and the matching values
         """
-        units = {
-            "temperature": "celsius",
-            "humidity": "percent",
-            "pressure": "hPa",
-            "light": "lux",
-            "motion": "binary",
-            "air_quality": "aqi"
-        }
-        return units.get(sensor_type, "unknown")
+        rand = random.random
+        sensor_types = random.choices(_SENSOR_TYPES, k=count)
+        
+        # Motion is binary (0 or 1), the others vary around their base value
+        values = [
+            (1 if rand() > 0.7 else 0) if sensor_type == "motion"
+            else _BASE_VALUES[sensor_type] + (rand() * 2 - 1) * _VARIATIONS[sensor_type]
+            for sensor_type in sensor_types
+        ]
+        
+        return sensor_types, values
     
     @staticmethod
-    def generate_log_entry() -> Dict[str, Any]:
+    def generate_log_entry(timestamp: Optional[str] = None,
+                           picks: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
         """
         Generate a sample log entry for testing.
         
+        Args:
+            timestamp: ISO timestamp of the entry, usually shared by a
+                generated batch. Defaults to now.
+            picks: Log level and service of the entry, usually drawn for a
+                whole batch. Drawn here by default.
+            
         Returns:
             Dict: A dictionary containing log entry data
         """
-        log_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
-        services = ["api", "auth", "database", "frontend", "backend", "worker", "scheduler"]
+        choice = random.choice
+        randint = random.randint
+        rand = random.random
+        uniform = random.uniform
+        uuid4 = uuid.uuid4
+        token_hex = secrets.token_hex
         
-        # Weight log levels to make critical errors less common
-        level_weights = [0.4, 0.3, 0.2, 0.08, 0.02]
-        log_level = random.choices(log_levels, weights=level_weights)[0]
+        if picks is not None:
+            log_level, service = picks
+        else:
+            log_level = random.choices(_LOG_LEVELS, cum_weights=_LOG_LEVEL_CUM_WEIGHTS)[0]
+            service = choice(_SERVICES)
         
         # Generate random trace and span IDs for distributed tracing
-        trace_id = uuid.uuid4().hex
-        span_id = uuid.uuid4().hex[:16]
+        trace_id = token_hex(16)
+        span_id = token_hex(8)
         
         # Create common log entry structure
         log_entry = {
-            "log_id": str(uuid.uuid4()),
-            "timestamp": datetime.now().isoformat(),
+            "log_id": str(uuid4()),
+            "timestamp": timestamp or datetime.now().isoformat(),
             "level": log_level,
-            "service": random.choice(services),
-            "instance_id": f"i-{uuid.uuid4().hex[:8]}",
+            "service": service,
+            "instance_id": f"i-{token_hex(4)}",
             "trace_id": trace_id,
             "span_id": span_id,
             "message": TestDataGenerator._generate_log_message(log_level),
             "context": {
-                "request_id": uuid.uuid4().hex if random.random() > 0.3 else None,
-                "user_id": f"user_{uuid.uuid4().hex[:8]}" if random.random() > 0.5 else None,
-                "resource": f"/{random.choice(['api', 'auth', 'admin'])}/v1/{random.choice(['users', 'orders', 'products', 'settings'])}" if random.random() > 0.4 else None
+                "request_id": token_hex(16) if rand() > 0.3 else None,
+                "user_id": f"user_{token_hex(4)}" if rand() > 0.5 else None,
+                "resource": f"/{choice(['api', 'auth', 'admin'])}/v1/{choice(['users', 'orders', 'products', 'settings'])}" if rand() > 0.4 else None
             }
         }
         
         # Add error details for warning, error and critical logs
-        if log_level in ["WARNING", "ERROR", "CRITICAL"]:
+        if log_level in ("WARNING", "ERROR", "CRITICAL"):
             log_entry["error"] = {
-                "code": random.randint(400, 599),
-                "type": random.choice(["ValidationError", "AuthenticationError", "DatabaseError", "TimeoutError", "InternalServerError"]),
-                "stack_trace": TestDataGenerator._generate_stack_trace() if log_level in ["ERROR", "CRITICAL"] else None
+                "code": randint(400, 599),
+                "type": choice(_ERROR_TYPES),
+                "stack_trace": TestDataGenerator._generate_stack_trace() if log_level in ("ERROR", "CRITICAL") else None
             }
         
         # Add performance metrics sometimes
-        if random.random() > 0.7:
+        if rand() > 0.7:
             log_entry["performance"] = {
-                "duration_ms": random.randint(1, 10000),
-                "cpu_percent": random.uniform(0.1, 100.0),
-                "memory_mb": random.uniform(10, 1024)
+                "duration_ms": randint(1, 10000),
+                "cpu_percent": uniform(0.1, 100.0),
+                "memory_mb": uniform(10, 1024)
             }
             
         return log_entry
@@ -217,58 +379,7 @@ class TestDataGenerator:
         Returns:
             str: A log message
         """
-        if level == "DEBUG":
-            messages = [
-                "Initializing component",
-                "Processing request parameters",
-                "Cache hit for key",
-                "Retrieved 23 records from database",
-                "API response received in 127ms",
-                "Connection established to service",
-                "Thread pool status: 4/10 active"
-            ]
-        elif level == "INFO":
-            messages = [
-                "User successfully authenticated",
-                "Payment processed successfully",
-                "New account created",
-                "Email notification sent",
-                "Database migration completed",
-                "Scheduled task started",
-                "API request completed successfully"
-            ]
-        elif level == "WARNING":
-            messages = [
-                "Rate limit threshold approaching",
-                "Database connection pool running low",
-                "API endpoint deprecated, please upgrade",
-                "High memory usage detected",
-                "Slow query execution (>500ms)",
-                "Retrying failed operation (attempt 2/3)",
-                "Cache miss rate above normal"
-            ]
-        elif level == "ERROR":
-            messages = [
-                "Failed to connect to database",
-                "API request timeout after 30s",
-                "Payment processing failed",
-                "Unable to send email notification",
-                "Invalid authentication token",
-                "Database query execution error",
-                "Service dependency unavailable"
-            ]
-        else:  # CRITICAL
-            messages = [
-                "System is out of disk space",
-                "Database connection pool exhausted",
-                "Fatal exception in main application thread",
-                "Security breach detected",
-                "Data corruption detected",
-                "Unrecoverable system state",
-                "Emergency shutdown initiated"
-            ]
-            
-        return random.choice(messages)
+        return random.choice(_MESSAGES_BY_LEVEL[level])
     
     @staticmethod
     def _generate_stack_trace() -> str:
@@ -278,34 +389,7 @@ class TestDataGenerator:
         Returns:
             str: A stack trace
         """
-        stack_traces = [
-            """Traceback (most recent call last):
-  File "/app/services/api.py", line 142, in process_request
-    result = database.execute_query(query)
-  File "/app/database/client.py", line 85, in execute_query
-    connection = self.get_connection()
-  File "/app/database/client.py", line 32, in get_connection
-    return self.connection_pool.acquire()
-  File "/app/database/pool.py", line 67, in acquire
-    raise DatabaseError("Connection pool exhausted")
-DatabaseError: Connection pool exhausted""",
-
-            """Traceback (most recent call last):
-  File "/app/workers/processor.py", line 78, in run
-    message = self.queue.get(timeout=5)
-  File "/usr/local/lib/python3.9/queue.py", line 178, in get
-    raise Empty
-EmptyQueueError: Timeout waiting for queue message""",
-
-            """Traceback (most recent call last):
-  File "/app/auth/jwt.py", line 56, in validate_token
-    decoded = jwt.decode(token, self.secret_key, algorithms=["HS256"])
-  File "/usr/local/lib/python3.9/site-packages/jwt/api_jwt.py", line 112, in decode
-    raise InvalidTokenError("Signature verification failed")
-jwt.exceptions.InvalidTokenError: Signature verification failed"""
-        ]
-        
-        return random.choice(stack_traces)
+        return random.choice(_STACK_TRACES)
     
     @staticmethod
     def generate_batch(data_type: str, count: int = 10) -> List[Dict[str, Any]]:
@@ -319,16 +403,42 @@ jwt.exceptions.InvalidTokenError: Signature verification failed"""
         Returns:
             List[Dict]: A list of generated data items
         """
+        # Items of a batch share one timestamp, taken once per batch
+        now = datetime.now()
+        timestamp = now.isoformat()
+        
         generators = {
-            'user_event': TestDataGenerator.generate_user_event,
-            'sensor_data': TestDataGenerator.generate_sensor_data,
-            'log_entry': TestDataGenerator.generate_log_entry
+            'user_event': partial(TestDataGenerator.generate_user_event, timestamp=timestamp),
+            'sensor_data': partial(TestDataGenerator.generate_sensor_data, timestamp=timestamp, now=now),
+            'log_entry': partial(TestDataGenerator.generate_log_entry, timestamp=timestamp)
         }
         
         if data_type not in generators:
             raise ValueError(f"Unknown data type: {data_type}. Must be one of {list(generators.keys())}")
+        
+        generate = generators[data_type]
+        
+        # Sensor types and values are drawn for the whole batch at once
+        if data_type == 'sensor_data':
+            readings = zip(*TestDataGenerator.generate_sensor_values_bulk(count))
+            return [generate(reading=reading) for reading in readings]
+        
+        # So are the categorical fields of user events and log entries
+        choices = random.choices
+        if data_type == 'user_event':
+            picks = zip(
+                choices(_EVENT_TYPES, k=count),
+                choices(_PLATFORMS, k=count),
+                choices(_BROWSERS, k=count),
+                choices(_COUNTRIES, k=count)
+            )
+        else:
+            picks = zip(
+                choices(_LOG_LEVELS, cum_weights=_LOG_LEVEL_CUM_WEIGHTS, k=count),
+                choices(_SERVICES, k=count)
+            )
             
-        return [generators[data_type]() for _ in range(count)]
+        return [generate(picks=item_picks) for item_picks in picks]
     
     @staticmethod
     def generate_simple_message() -> Dict[str, Any]:
@@ -349,11 +459,102 @@ jwt.exceptions.InvalidTokenError: Signature verification failed"""
             }
         }
         
+    @staticmethod
+    def iter_data(count: int = 100, data_type: str = "mixed", batch_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Generate test data one batch at a time, yielding it item by item.
+        
+        Items are generated with generate_batch, batch_size at a time, so
+        only one batch is held in memory. Mixed data holds the same number
+        of items of each type as before, in random order: the type of each
+        item is drawn with weights equal to the number of items of each
+        type still to be generated.
+        
+        Args:
+            count: Number of data items to generate
+            data_type: Type of data to generate ('user_event', 'sensor_data', 'log_entry', or 'mixed')
+            batch_size: Number of items to generate in each batch
+            
+        Returns:
+            Iterator[Dict]: An iterator over the generated data items
+        """
+        if data_type == "mixed":
+            return TestDataGenerator._iter_mixed(count, batch_size)
+        
+        if data_type not in _DATA_TYPES:
+            raise ValueError(f"Unknown data type: {data_type}. Must be one of {list(_DATA_TYPES)}")
+        
+        return TestDataGenerator._iter_batches(count, data_type, batch_size)
+    
+    @staticmethod
+    def _iter_batches(count: int, data_type: str, batch_size: int) -> Iterator[Dict[str, Any]]:
+        """
+        Generate count items of one type, batch_size at a time.
+        """
+        for start in range(0, count, batch_size):
+            yield from TestDataGenerator.generate_batch(data_type, min(batch_size, count - start))
+    
+    @staticmethod
+    def _iter_mixed(count: int, batch_size: int) -> Iterator[Dict[str, Any]]:
+        """
+        Generate items of all data types in random order, batch_size at a
+        time, splitting count as evenly as possible between the types.
+        """
+        # Items still to generate per type, the first types taking the remainder
+        type_count, remainder = divmod(count, len(_DATA_TYPES))
+        remaining = [type_count + (1 if i < remainder else 0) for i in range(len(_DATA_TYPES))]
+        
+        left = count
+        while left:
+            # Draw the type of each item of this batch
+            order = []
+            for _ in range(min(batch_size, left)):
+                pick = random.randrange(left)
+                for i, type_left in enumerate(remaining):
+                    if pick < type_left:
+                        break
+                    pick -= type_left
+                remaining[i] -= 1
+                left -= 1
+                order.append(i)
+            
+            # Generate the items of each type in one batch, then emit them in the drawn order
+            batches = [
+                iter(TestDataGenerator.generate_batch(data_type, order.count(i)))
+                for i, data_type in enumerate(_DATA_TYPES)
+            ]
+            for i in order:
+                yield next(batches[i])
+    
+    @staticmethod
+    def generate_bytes(count: int = 100, data_type: str = "mixed") -> bytes:
+        """
+        Generate test data encoded as an indented JSON array.
+        
+        Args:
+            count: Number of data items to generate
+            data_type: Type of data to generate ('user_event', 'sensor_data', 'log_entry', or 'mixed')
+            
+        Returns:
+            bytes: The generated data as UTF-8 encoded JSON
+        """
+        if data_type == "mixed":
+            # Generate a mix of all data types, already in random order
+            data = list(TestDataGenerator.iter_data(count, data_type))
+        else:
+            # Generate specific data type
+            data = TestDataGenerator.generate_batch(data_type, count)
+        
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        
     @staticmethod
     def generate_to_file(file_path: str, count: int = 100, data_type: str = "mixed", batch_size: int = 10) -> bool:
         """
         Generate test data and write it to a file.
         
+        Items are generated batch_size at a time and encoded and written as
+        a JSON array one at a time, so memory use does not grow with count.
+        
         Args:
             file_path: Path to output file
             count: Number of data items to generate
@@ -364,31 +565,17 @@ jwt.exceptions.InvalidTokenError: Signature verification failed"""
             bool: True if successful, False otherwise
         """
         try:
-            if data_type == "mixed":
-                # Generate a mix of all data types
-                data_types = ["user_event", "sensor_data", "log_entry"]
-                data = []
-                
-                # Distribute count roughly evenly among data types
-                type_count = count // len(data_types)
-                remaining = count % len(data_types)
-                
-                for dt in data_types:
-                    # Add an extra item for some types if there's a remainder
-                    curr_count = type_count + (1 if remaining > 0 else 0)
-                    remaining -= 1 if remaining > 0 else 0
-                    
-                    data.extend(TestDataGenerator.generate_batch(dt, curr_count))
-                    
-                # Shuffle to mix data types
-                random.shuffle(data)
-            else:
-                # Generate specific data type
-                data = TestDataGenerator.generate_batch(data_type, count)
+            items = TestDataGenerator.iter_data(count, data_type, batch_size)
             
-            # Write to file
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Write to file, laid out like orjson's OPT_INDENT_2 output for the whole array
+            with open(file_path, 'wb', buffering=1 << 20) as f:
+                f.write(b"[")
+                separator = b"\n  "
+                for item in items:
+                    f.write(separator)
+                    f.write(orjson.dumps(item, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  "))
+                    separator = b",\n  "
+                f.write(b"]" if separator == b"\n  " else b"\n]")
                 
             return True
         except Exception as e:
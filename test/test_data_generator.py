@@ -2,12 +2,15 @@
 Test data generator for the AWS SQS to Kafka streaming application.
 Generates synthetic data for testing the SQS simulator and streaming process.
 """
-import json
+import os
 import random
-import time
+import shutil
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from multiprocessing import Pool
+from typing import BinaryIO, List, Dict, Any, Optional
+
+import orjson
 
 # Sample data patterns
 EVENT_TYPES = ["purchase", "pageview", "login", "logout", "signup", "click", "impression", "error"]
@@ -23,260 +26,444 @@ CITIES = ["New York", "London", "Toronto", "Berlin", "Paris", "Tokyo", "Sydney",
 PRODUCTS = ["t-shirt", "jeans", "shoes", "hat", "sunglasses", "watch", "bag", "dress", "jacket", "socks"]
 PAYMENT_METHODS = ["credit_card", "paypal", "apple_pay", "google_pay", "bank_transfer"]
 
+# Time between the batches written by generate_to_file, as if generated live
+BATCH_INTERVAL = timedelta(milliseconds=10)
+# Progress is printed once per this many batches
+PROGRESS_EVERY_BATCHES = 100
+
 class TestDataGenerator:
     """
     Generates test data for simulating SQS messages and streaming.
     """
     
     @staticmethod
-    def generate_user_event() -> Dict[str, Any]:
+    def generate_user_event(now: Optional[datetime] = None, rng: Optional[random.Random] = None) -> Dict[str, Any]:
         """
         Generate a random user event.
         
+        Args:
+            now: Time the event is generated at. Defaults to now.
+            rng: Random number generator to draw from. Defaults to the
+                random module's shared generator.
+            
         Returns:
             Dictionary with event data
         """
-        event_type = random.choice(EVENT_TYPES)
-        timestamp = datetime.now() - timedelta(seconds=random.randint(0, 3600))
+        if rng is None:
+            rng = random
+        
+        event_type = rng.choice(EVENT_TYPES)
+        timestamp = (now or datetime.now()) - timedelta(seconds=rng.randint(0, 3600))
+        
+        # Both variable octets of the IP address come from one draw
+        ip_high, ip_low = divmod(rng.randrange(256 * 254), 254)
         
         # Base event data
         event = {
-            "event_id": str(uuid.uuid4()),
+            "event_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
             "event_type": event_type,
             "timestamp": timestamp.isoformat(),
-            "user_id": f"user_{random.randint(1, 1000)}",
-            "session_id": f"session_{random.randint(1, 5000)}",
-            "user_agent": random.choice(USER_AGENTS),
-            "ip_address": f"192.168.{random.randint(0, 255)}.{random.randint(1, 254)}",
+            "user_id": f"user_{rng.randint(1, 1000)}",
+            "session_id": f"session_{rng.randint(1, 5000)}",
+            "user_agent": rng.choice(USER_AGENTS),
+            "ip_address": f"192.168.{ip_high}.{ip_low + 1}",
             "location": {
-                "country": random.choice(COUNTRIES),
-                "city": random.choice(CITIES),
-                "latitude": round(random.uniform(-90, 90), 6),
-                "longitude": round(random.uniform(-180, 180), 6)
+                "country": rng.choice(COUNTRIES),
+                "city": rng.choice(CITIES),
+                "latitude": round(rng.uniform(-90, 90), 6),
+                "longitude": round(rng.uniform(-180, 180), 6)
             }
         }
         
-        # Add event-specific data
+        TestDataGenerator._add_event_details(event, rng)
+        return event
+    
+    @staticmethod
+    def generate_user_events(count: int = 10, now: Optional[datetime] = None,
+                             rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        """
+        Generate a batch of random user events.
+        
+        The randomness for the base fields of all events is drawn up front,
+        one call per field for the whole batch, and the event IDs are cut
+        from a single getrandbits draw, instead of making these calls once
+        per event. Events of a batch are timed relative to one time.
+        
+        Args:
+            count: Number of events to generate
+            now: Time the events are generated at. Defaults to now.
+            rng: Random number generator to draw from. Defaults to the
+                random module's shared generator.
+            
+        Returns:
+            List of event dictionaries
+        """
+        if rng is None:
+            rng = random
+        
+        choices = rng.choices
+        uniform = rng.uniform
+        
+        if now is None:
+            now = datetime.now()
+        event_types = choices(EVENT_TYPES, k=count)
+        ages = choices(range(3601), k=count)
+        user_ids = choices(range(1, 1001), k=count)
+        session_ids = choices(range(1, 5001), k=count)
+        user_agents = choices(USER_AGENTS, k=count)
+        ip_third_octets = choices(range(256), k=count)
+        ip_fourth_octets = choices(range(1, 255), k=count)
+        countries = choices(COUNTRIES, k=count)
+        cities = choices(CITIES, k=count)
+        # getrandbits rather than randbytes, which needs Python 3.9;
+        # getrandbits(0) raises before Python 3.9, hence the guard
+        id_bytes = rng.getrandbits(128 * count).to_bytes(16 * count, 'little') if count else b""
+        
+        events = []
+        for i in range(count):
+            event = {
+                "event_id": str(uuid.UUID(bytes=id_bytes[16 * i:16 * i + 16], version=4)),
+                "event_type": event_types[i],
+                "timestamp": (now - timedelta(seconds=ages[i])).isoformat(),
+                "user_id": f"user_{user_ids[i]}",
+                "session_id": f"session_{session_ids[i]}",
+                "user_agent": user_agents[i],
+                "ip_address": f"192.168.{ip_third_octets[i]}.{ip_fourth_octets[i]}",
+                "location": {
+                    "country": countries[i],
+                    "city": cities[i],
+                    "latitude": round(uniform(-90, 90), 6),
+                    "longitude": round(uniform(-180, 180), 6)
+                }
+            }
+            TestDataGenerator._add_event_details(event, rng)
+            events.append(event)
+        
+        return events
+    
+    @staticmethod
+    def _add_event_details(event: Dict[str, Any], rng: random.Random):
+        """
+        Add the data specific to the event's type to a user event.
+        
+        Args:
+            event: User event with its base fields set
+            rng: Random number generator to draw from
+        """
+        event_type = event["event_type"]
         if event_type == "purchase":
             items = []
-            for _ in range(random.randint(1, 5)):
+            for _ in range(rng.randint(1, 5)):
                 items.append({
-                    "product_id": f"prod_{random.randint(1, 100)}",
-                    "product_name": random.choice(PRODUCTS),
-                    "quantity": random.randint(1, 5),
-                    "price": round(random.uniform(9.99, 99.99), 2)
+                    "product_id": f"prod_{rng.randint(1, 100)}",
+                    "product_name": rng.choice(PRODUCTS),
+                    "quantity": rng.randint(1, 5),
+                    "price": round(rng.uniform(9.99, 99.99), 2)
                 })
             
             event.update({
-                "order_id": f"order_{random.randint(10000, 99999)}",
+                "order_id": f"order_{rng.randint(10000, 99999)}",
                 "items": items,
                 "total_amount": sum(item["price"] * item["quantity"] for item in items),
                 "currency": "USD",
-                "payment_method": random.choice(PAYMENT_METHODS),
+                "payment_method": rng.choice(PAYMENT_METHODS),
                 "shipping_address": {
-                    "street": f"{random.randint(1, 999)} Main St",
+                    "street": f"{rng.randint(1, 999)} Main St",
                     "city": event["location"]["city"],
                     "country": event["location"]["country"],
-                    "postal_code": f"{random.randint(10000, 99999)}"
+                    "postal_code": f"{rng.randint(10000, 99999)}"
                 }
             })
         elif event_type == "pageview":
             event.update({
-                "page_url": f"https://example.com/{random.choice(['home', 'products', 'about', 'contact', 'blog'])}",
-                "referrer": random.choice([
+                "page_url": f"https://example.com/{rng.choice(['home', 'products', 'about', 'contact', 'blog'])}",
+                "referrer": rng.choice([
                     "https://www.google.com/",
                     "https://www.facebook.com/",
                     "https://www.twitter.com/",
                     "https://www.instagram.com/",
                     "direct"
                 ]),
-                "time_on_page": random.randint(5, 300)
+                "time_on_page": rng.randint(5, 300)
             })
         elif event_type in ["login", "logout", "signup"]:
             event.update({
-                "success": random.choice([True, True, True, False]),
-                "method": random.choice(["email", "google", "facebook", "apple", "twitter"]),
-                "device_type": random.choice(["desktop", "mobile", "tablet"])
+                "success": rng.choice([True, True, True, False]),
+                "method": rng.choice(["email", "google", "facebook", "apple", "twitter"]),
+                "device_type": rng.choice(["desktop", "mobile", "tablet"])
             })
         elif event_type in ["click", "impression"]:
             event.update({
-                "element_id": f"el_{random.randint(1, 100)}",
-                "element_type": random.choice(["button", "link", "image", "video", "banner"]),
-                "page_section": random.choice(["header", "footer", "sidebar", "main", "navigation"])
+                "element_id": f"el_{rng.randint(1, 100)}",
+                "element_type": rng.choice(["button", "link", "image", "video", "banner"]),
+                "page_section": rng.choice(["header", "footer", "sidebar", "main", "navigation"])
             })
         elif event_type == "error":
             event.update({
-                "error_code": random.choice(STATUS_CODES),
-                "error_message": random.choice([
+                "error_code": rng.choice(STATUS_CODES),
+                "error_message": rng.choice([
                     "Connection timeout",
                     "Invalid credentials",
                     "Resource not found",
                     "Server error",
                     "Permission denied"
                 ]),
-                "stack_trace": f"Error at line {random.randint(1, 1000)}"
+                "stack_trace": f"Error at line {rng.randint(1, 1000)}"
             })
-        
-        return event
     
     @staticmethod
-    def generate_sensor_data() -> Dict[str, Any]:
+    def generate_sensor_data(now: Optional[datetime] = None, rng: Optional[random.Random] = None) -> Dict[str, Any]:
         """
         Generate random IoT sensor data.
         
+        Args:
+            now: Time the data is generated at. Defaults to now.
+            rng: Random number generator to draw from. Defaults to the
+                random module's shared generator.
+            
         Returns:
             Dictionary with sensor data
         """
+        if rng is None:
+            rng = random
+        
         sensor_types = ["temperature", "humidity", "pressure", "light", "motion", "air_quality", "sound"]
-        sensor_type = random.choice(sensor_types)
+        sensor_type = rng.choice(sensor_types)
+        timestamp = (now or datetime.now()).isoformat()
         
         # Base sensor data
         data = {
-            "sensor_id": f"sensor_{random.randint(1, 100)}",
-            "device_id": f"device_{random.randint(1, 50)}",
-            "timestamp": datetime.now().isoformat(),
+            "sensor_id": f"sensor_{rng.randint(1, 100)}",
+            "device_id": f"device_{rng.randint(1, 50)}",
+            "timestamp": timestamp,
             "sensor_type": sensor_type,
             "location": {
-                "building": f"Building {random.randint(1, 5)}",
-                "floor": random.randint(1, 10),
-                "room": f"Room {random.randint(101, 999)}",
-                "latitude": round(random.uniform(-90, 90), 6),
-                "longitude": round(random.uniform(-180, 180), 6)
+                "building": f"Building {rng.randint(1, 5)}",
+                "floor": rng.randint(1, 10),
+                "room": f"Room {rng.randint(101, 999)}",
+                "latitude": round(rng.uniform(-90, 90), 6),
+                "longitude": round(rng.uniform(-180, 180), 6)
             },
-            "battery_level": random.randint(1, 100),
-            "status": random.choice(["active", "active", "active", "warning", "error"]),
-            "firmware_version": f"{random.randint(1, 5)}.{random.randint(0, 9)}.{random.randint(0, 99)}"
+            "battery_level": rng.randint(1, 100),
+            "status": rng.choice(["active", "active", "active", "warning", "error"]),
+            "firmware_version": f"{rng.randint(1, 5)}.{rng.randint(0, 9)}.{rng.randint(0, 99)}"
         }
         
         # Add sensor-specific readings
         if sensor_type == "temperature":
             data["reading"] = {
-                "value": round(random.uniform(-10, 40), 1),
+                "value": round(rng.uniform(-10, 40), 1),
                 "unit": "celsius"
             }
         elif sensor_type == "humidity":
             data["reading"] = {
-                "value": round(random.uniform(0, 100), 1),
+                "value": round(rng.uniform(0, 100), 1),
                 "unit": "percent"
             }
         elif sensor_type == "pressure":
             data["reading"] = {
-                "value": round(random.uniform(980, 1050), 1),
+                "value": round(rng.uniform(980, 1050), 1),
                 "unit": "hPa"
             }
         elif sensor_type == "light":
             data["reading"] = {
-                "value": random.randint(0, 1000),
+                "value": rng.randint(0, 1000),
                 "unit": "lux"
             }
         elif sensor_type == "motion":
             data["reading"] = {
-                "value": random.choice([True, False]),
-                "last_motion": datetime.now().isoformat() if random.choice([True, False]) else None
+                "value": rng.choice([True, False]),
+                "last_motion": timestamp if rng.choice([True, False]) else None
             }
         elif sensor_type == "air_quality":
             data["reading"] = {
-                "co2": random.randint(300, 2000),
-                "tvoc": random.randint(0, 1000),
-                "pm25": round(random.uniform(0, 100), 1),
-                "pm10": round(random.uniform(0, 150), 1),
-                "aqi": random.randint(0, 500)
+                "co2": rng.randint(300, 2000),
+                "tvoc": rng.randint(0, 1000),
+                "pm25": round(rng.uniform(0, 100), 1),
+                "pm10": round(rng.uniform(0, 150), 1),
+                "aqi": rng.randint(0, 500)
             }
         elif sensor_type == "sound":
             data["reading"] = {
-                "value": random.randint(30, 100),
+                "value": rng.randint(30, 100),
                 "unit": "dB"
             }
         
         return data
     
     @staticmethod
-    def generate_log_entry() -> Dict[str, Any]:
+    def generate_log_entry(now: Optional[datetime] = None, rng: Optional[random.Random] = None) -> Dict[str, Any]:
         """
         Generate a random log entry.
         
+        Args:
+            now: Time the entry is generated at. Defaults to now.
+            rng: Random number generator to draw from. Defaults to the
+                random module's shared generator.
+            
         Returns:
             Dictionary with log data
         """
+        if rng is None:
+            rng = random
+        
         log_levels = ["DEBUG", "INFO", "INFO", "WARNING", "ERROR", "CRITICAL"]
         services = ["api", "auth", "database", "notification", "payment", "user", "order", "inventory"]
         
+        # Both variable octets of the IP address come from one draw
+        ip_high, ip_low = divmod(rng.randrange(256 * 254), 254)
+        
         return {
-            "timestamp": datetime.now().isoformat(),
-            "level": random.choice(log_levels),
-            "service": random.choice(services),
-            "instance": f"instance-{random.randint(1, 10)}",
-            "message": f"Log message {random.randint(1000, 9999)}",
-            "trace_id": str(uuid.uuid4()),
-            "request_id": str(uuid.uuid4()),
-            "user_id": f"user_{random.randint(1, 1000)}",
-            "duration_ms": random.randint(1, 10000),
-            "status_code": random.choice(STATUS_CODES),
-            "endpoint": f"/{random.choice(['api', 'v1', 'v2'])}/{random.choice(services)}/{random.choice(['get', 'create', 'update', 'delete'])}",
-            "method": random.choice(["GET", "POST", "PUT", "DELETE"]),
-            "user_agent": random.choice(USER_AGENTS),
-            "ip_address": f"192.168.{random.randint(0, 255)}.{random.randint(1, 254)}"
+            "timestamp": (now or datetime.now()).isoformat(),
+            "level": rng.choice(log_levels),
+            "service": rng.choice(services),
+            "instance": f"instance-{rng.randint(1, 10)}",
+            "message": f"Log message {rng.randint(1000, 9999)}",
+            "trace_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "request_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "user_id": f"user_{rng.randint(1, 1000)}",
+            "duration_ms": rng.randint(1, 10000),
+            "status_code": rng.choice(STATUS_CODES),
+            "endpoint": f"/{rng.choice(['api', 'v1', 'v2'])}/{rng.choice(services)}/{rng.choice(['get', 'create', 'update', 'delete'])}",
+            "method": rng.choice(["GET", "POST", "PUT", "DELETE"]),
+            "user_agent": rng.choice(USER_AGENTS),
+            "ip_address": f"192.168.{ip_high}.{ip_low + 1}"
         }
     
     @classmethod
-    def generate_batch(cls, count: int = 10, data_type: str = "mixed") -> List[Dict[str, Any]]:
+    def generate_batch(cls, count: int = 10, data_type: str = "mixed",
+                       now: Optional[datetime] = None, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
         """
         Generate a batch of test data.
         
         Args:
             count: Number of data items to generate
             data_type: Type of data to generate (user_event, sensor_data, log_entry, or mixed)
+            now: Time the batch is generated at. Defaults to now.
+            rng: Random number generator to draw from. Defaults to the
+                random module's shared generator.
             
         Returns:
             List of data dictionaries
         """
+        if rng is None:
+            rng = random
+        
+        # User events are drawn in bulk
+        if data_type == "user_event":
+            return cls.generate_user_events(count, now, rng)
+        
         batch = []
         
         for _ in range(count):
-            if data_type == "user_event":
-                batch.append(cls.generate_user_event())
-            elif data_type == "sensor_data":
-                batch.append(cls.generate_sensor_data())
+            if data_type == "sensor_data":
+                batch.append(cls.generate_sensor_data(now, rng))
             elif data_type == "log_entry":
-                batch.append(cls.generate_log_entry())
+                batch.append(cls.generate_log_entry(now, rng))
             elif data_type == "mixed":
-                generator = random.choice([
+                generator = rng.choice([
                     cls.generate_user_event,
                     cls.generate_sensor_data,
                     cls.generate_log_entry
                 ])
-                batch.append(generator())
+                batch.append(generator(now, rng))
             else:
                 raise ValueError(f"Unknown data type: {data_type}")
         
         return batch
     
     @classmethod
-    def generate_to_file(cls, filename: str, count: int = 100, data_type: str = "mixed", batch_size: int = 10):
+    def generate_to_file(cls, filename: str, count: int = 100, data_type: str = "mixed", batch_size: int = 10,
+                         processes: int = 1, seed: Optional[int] = None):
         """
         Generate test data and save to a file.
         
+        Batches are timed BATCH_INTERVAL apart from the start, without
+        waiting for that time to pass. With several processes, each one
+        generates a contiguous shard of the batches into its own file, and
+        the shards are then concatenated in order.
+        
         Args:
             filename: Path to the output file
             count: Total number of data items to generate
             data_type: Type of data to generate
             batch_size: Number of items to generate in each batch
+            processes: Number of processes generating the data in parallel
+            seed: Seed for reproducible data; shard n is seeded with seed + n.
+                Random by default.
         """
-        with open(filename, 'w') as f:
-            for i in range(0, count, batch_size):
-                batch_count = min(batch_size, count - i)
-                batch = cls.generate_batch(batch_count, data_type)
-                
-                for item in batch:
-                    f.write(json.dumps(item) + "\n")
-                    
-                # Progress indicator
-                print(f"Generated {min(i + batch_count, count)} of {count} items", end="\r")
-                
-                # Small delay to make timestamps more realistic
-                time.sleep(0.01)
+        start = datetime.now()
+        
+        if processes <= 1:
+            with open(filename, 'wb') as f:
+                cls._write_batches(f, 0, count, data_type, batch_size, start, random.Random(seed), progress=True)
+        else:
+            # Split the batches as evenly as possible between the shards
+            batch_total = -(-count // batch_size)
+            shard_batches, remainder = divmod(batch_total, processes)
+            shards = []
+            first_batch = 0
+            for shard_number in range(processes):
+                end_batch = first_batch + shard_batches + (1 if shard_number < remainder else 0)
+                shard_seed = None if seed is None else seed + shard_number
+                shards.append((f"{filename}.part{shard_number}", first_batch * batch_size,
+                               min(end_batch * batch_size, count), data_type, batch_size, start, shard_seed))
+                first_batch = end_batch
+            
+            with Pool(processes) as pool:
+                shard_files = pool.starmap(_generate_shard, shards)
+            
+            with open(filename, 'wb') as f:
+                for shard_file in shard_files:
+                    with open(shard_file, 'rb') as shard:
+                        shutil.copyfileobj(shard, f)
+                    os.remove(shard_file)
                 
         print(f"\nGenerated {count} items and saved to {filename}")
+    
+    @classmethod
+    def _write_batches(cls, f: BinaryIO, first: int, end: int, data_type: str, batch_size: int,
+                       start: datetime, rng: random.Random, progress: bool = False):
+        """
+        Generate the items from first up to end in batches and write them as JSON lines.
+        
+        Args:
+            f: File to write to
+            first: Index of the first item, at the start of a batch
+            end: Index after the last item
+            data_type: Type of data to generate
+            batch_size: Number of items to generate in each batch
+            start: Time the first batch of the whole file is generated at
+            rng: Random number generator to draw from
+            progress: Whether to print progress
+        """
+        for i in range(first, end, batch_size):
+            batch_number = i // batch_size
+            batch_count = min(batch_size, end - i)
+            batch = cls.generate_batch(batch_count, data_type, start + batch_number * BATCH_INTERVAL, rng)
+            
+            # Encode the batch as JSON lines and write it at once
+            lines = bytearray()
+            for item in batch:
+                lines += orjson.dumps(item)
+                lines += b"\n"
+            f.write(lines)
+                
+            # Progress indicator
+            if progress and (batch_number + 1) % PROGRESS_EVERY_BATCHES == 0:
+                print(f"Generated {i + batch_count} of {end} items", end="\r")
+
+def _generate_shard(shard_file: str, first: int, end: int, data_type: str, batch_size: int,
+                    start: datetime, seed: Optional[int]) -> str:
+    """
+    Generate one shard of TestDataGenerator.generate_to_file in a worker process.
+    
+    Returns:
+        The path of the written shard file
+    """
+    with open(shard_file, 'wb') as f:
+        TestDataGenerator._write_batches(f, first, end, data_type, batch_size, start, random.Random(seed))
+    return shard_file
 
 if __name__ == "__main__":
     # Generate sample test data
@@ -12,10 +12,13 @@ import os
 import sys
 import time
 import unittest
+from concurrent.futures import Future
 from unittest.mock import MagicMock, patch
 import uuid
 from typing import Dict, List, Any, Optional
 
+from confluent_kafka import KafkaError, KafkaException
+
 # Add project root to Python path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -165,14 +168,17 @@ class MockAdminClient:
         """
         Mock create_topics method.
         """
+        futures = {}
         for topic in new_topics:
             # In the real NewTopic, the name is a property accessed via topic.topic
             topic_name = topic.topic if hasattr(topic, 'topic') else str(topic)
             self.topics[topic_name] = MagicMock()
+            
+            # Like the real client, return a completed future per topic
+            futures[topic_name] = Future()
+            futures[topic_name].set_result(None)
         
-        result = MagicMock()
-        result.result = MagicMock(return_value={})
-        return result
+        return futures
     
     def add_topic(self, topic_name):
         """
@@ -210,7 +216,13 @@ class IsolatedSQSTest(unittest.TestCase):
         # Send a message
         message_id = sqs.send_message(test_data)
         self.assertIsNotNone(message_id, "Should get a message ID")
-        
+
+        # Send a batch of messages
+        message_ids = sqs.send_messages([test_data, test_data])
+        self.assertEqual(len(message_ids), 2, "Should get a message ID per message")
+        self.assertNotIn(None, message_ids, "All messages should be sent")
+        self.assertEqual(len(sqs.producer.messages), 3, "Should have produced three messages")
+
         # Create a mock consumer response
         receipt_handle = f"test-queue-0-0-{uuid.uuid4().hex}"
         mock_message = {
@@ -240,6 +252,10 @@ class IsolatedSQSTest(unittest.TestCase):
             receipt_handle = messages[0]['receipt_handle']
             result = sqs.delete_message(receipt_handle)
             self.assertTrue(result, "Delete should succeed")
+            
+            # Delete messages in a batch, rejecting malformed receipt handles
+            results = sqs.delete_messages([receipt_handle, "invalid"])
+            self.assertEqual(results, [True, False], "Only the valid handle should be deleted")
         finally:
             # Restore original method
             sqs.receive_messages = original_receive
@@ -249,8 +265,8 @@ class IsolatedKafkaTest(unittest.TestCase):
     """
     Test the Kafka Connector with complete isolation using mocks.
     """
-    @patch('confluent_kafka.Producer', MockKafkaProducer)
-    @patch('confluent_kafka.admin.AdminClient', MockAdminClient)
+    @patch('backend.src.connectors.kafka_connector.Producer', MockKafkaProducer)
+    @patch('backend.src.connectors.kafka_connector.AdminClient', MockAdminClient)
     def test_kafka_send(self):
         """
         Test sending messages to Kafka.
@@ -291,6 +307,67 @@ class IsolatedKafkaTest(unittest.TestCase):
             
         self.assertEqual(sent_key, "test-key", "Key should match")
 
+        # Pre-encoded JSON is sent without re-serializing
+        encoded = json.dumps(test_data).encode('utf-8')
+        result = kafka.send_message(encoded)
+        self.assertTrue(result, "Send of encoded message should succeed")
+        self.assertIs(kafka.producer.messages[2]['value'], encoded, "Encoded value should be passed through")
+
+        # Delivery reports go to the caller's callback when one is given
+        reports = []
+        result = kafka.send_message(test_data, on_delivery=lambda err, msg: reports.append(err))
+        self.assertTrue(result, "Send with delivery callback should succeed")
+        sent = kafka.send_messages([(None, test_data, None)] * 2, on_delivery=lambda err, msg: reports.append(err))
+        self.assertEqual(sent, 2, "Both messages should be queued")
+        self.assertEqual(reports, [None, None, None], "Each delivery should be reported to the callback")
+
+        # A connector given an existing producer sends through it
+        shared = KafkaConnector(bootstrap_servers="localhost:9092", topic="test-topic", producer=kafka.producer)
+        self.assertIs(shared.producer, kafka.producer, "Producer should be shared")
+        shared.send_message(test_data)
+        self.assertEqual(len(kafka.producer.messages), 7, "Shared producer should have the message")
+        self.assertIsNotNone(kafka._poll_thread, "Owner of the producer should poll it")
+        self.assertIsNone(shared._poll_thread, "Shared producer should be polled by its owner only")
+
+    @patch('backend.src.connectors.kafka_connector.Producer', MockKafkaProducer)
+    @patch('backend.src.connectors.kafka_connector.AdminClient', MockAdminClient)
+    def test_ensure_topic_exists_cached(self):
+        """
+        Test that known topics are not re-fetched from cluster metadata.
+        """
+        from backend.src.connectors.kafka_connector import KafkaConnector
+
+        # Create the Kafka connector, which creates its default topic
+        kafka = KafkaConnector(bootstrap_servers="localhost:9092", topic="test-topic")
+
+        # Count metadata requests from now on
+        kafka.admin_client.list_topics = MagicMock(wraps=kafka.admin_client.list_topics)
+
+        # The default topic and newly created topics are already known
+        kafka.ensure_topic_exists("test-topic")
+        kafka.create_topics(["new-topic"])
+        kafka.ensure_topic_exists("new-topic")
+        self.assertEqual(kafka.admin_client.list_topics.call_count, 0, "Should use cached topics")
+
+        # Unknown topics still trigger a metadata request
+        kafka.ensure_topic_exists("other-topic")
+        self.assertEqual(kafka.admin_client.list_topics.call_count, 1, "Should fetch topics once")
+
+        # A topic whose creation failed is not cached
+        failed = Future()
+        failed.set_exception(KafkaException(KafkaError(KafkaError.POLICY_VIOLATION)))
+        kafka.admin_client.create_topics = MagicMock(return_value={"failed-topic": failed})
+        kafka.ensure_topic_exists("failed-topic")
+        kafka.ensure_topic_exists("failed-topic")
+        self.assertEqual(kafka.admin_client.list_topics.call_count, 3, "Failed topic should not be cached")
+        with self.assertRaises(KafkaException):
+            kafka.create_topics(["failed-topic"])
+
+        # Listing topics falls back to the default topic when the request fails
+        self.assertIn("new-topic", kafka.list_topics(), "Should list created topics")
+        kafka.admin_client.list_topics = MagicMock(side_effect=KafkaException(KafkaError(KafkaError._TRANSPORT)))
+        self.assertEqual(kafka.list_topics(), ["test-topic"], "Should fall back to the default topic")
+
 
 class IsolatedStreamProcessorTest(unittest.TestCase):
     """
@@ -10,11 +10,15 @@ import os
 from typing import List, Dict, Any
 
 # Add project root to Python path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 from backend.src.connectors.kafka_connector import KafkaConnector
 # Update import path to use test-data folder
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'test-data'))
+TEST_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'test-data'))
+if TEST_DATA_DIR not in sys.path:
+    sys.path.insert(0, TEST_DATA_DIR)
 from data_generator import TestDataGenerator
 
 # Configure logging
@@ -113,19 +117,29 @@ class KafkaConnectorTest:
         # Generate batch of test messages
         messages = TestDataGenerator.generate_batch(count, data_type)
         
-        # Send messages
-        success_count = 0
+        delivery_errors = []
         
-        for message in messages:
-            result = self.connector.send_message(message)
-            if result:
-                success_count += 1
+        def on_delivery(err, msg):
+            if err is not None:
+                delivery_errors.append(err)
         
-        logger.info(f"Successfully sent {success_count} of {count} messages")
+        # Send messages in one batch, collecting delivery failures
+        success_count = self.connector.send_messages(
+            ((None, message, None) for message in messages),
+            on_delivery=on_delivery
+        )
         
         # Flush producer to ensure all messages are sent
         self.connector.flush()
         
+        # Messages still queued after the flush timeout were not delivered
+        undelivered = len(self.connector.producer)
+        if undelivered:
+            logger.error(f"{undelivered} messages were not delivered before the flush timeout")
+        
+        success_count -= len(delivery_errors) + undelivered
+        logger.info(f"Successfully sent {success_count} of {count} messages")
+        
         return success_count == count
     
     def test_send_with_key(self) -> bool:
@@ -0,0 +1,92 @@
+"""
+Test script for the streaming metrics counters.
+"""
+import json
+import sys
+import os
+import threading
+import unittest
+
+# Add project root to Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.src.utils.metrics import (
+    Counters,
+    StreamStatus,
+    MESSAGES_PROCESSED,
+    PROCESSING_ERRORS,
+    KAFKA_SEND_ERRORS
+)
+
+
+class TestCounters(unittest.TestCase):
+    """Test the fixed-slot metrics counters."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.counters = Counters()
+
+    def test_initial_state(self):
+        """Test that counters start at zero with the stream stopped."""
+        self.assertEqual(self.counters.snapshot(), (0, 0, 0, 0))
+        self.assertEqual(self.counters.status, StreamStatus.STOPPED)
+
+    def test_inc(self):
+        """Test incrementing counter slots."""
+        self.counters.inc(MESSAGES_PROCESSED)
+        self.counters.inc(MESSAGES_PROCESSED)
+        self.counters.inc(PROCESSING_ERRORS)
+        self.counters.inc(KAFKA_SEND_ERRORS, 3)
+
+        counts = self.counters.snapshot()
+        self.assertEqual(counts[MESSAGES_PROCESSED], 2)
+        self.assertEqual(counts[PROCESSING_ERRORS], 1)
+        self.assertEqual(counts[KAFKA_SEND_ERRORS], 3)
+
+    def test_inc_from_threads(self):
+        """Test that increments from several threads are summed."""
+        def worker():
+            for _ in range(1000):
+                self.counters.inc(MESSAGES_PROCESSED)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.counters.inc(MESSAGES_PROCESSED)
+
+        self.assertEqual(self.counters.snapshot()[MESSAGES_PROCESSED], 4001)
+
+    def test_to_dict(self):
+        """Test the API metrics schema."""
+        self.counters.inc(MESSAGES_PROCESSED)
+        self.counters.status = StreamStatus.RUNNING
+        self.counters.last_processing_time = "2025-06-03T10:00:00"
+
+        self.assertEqual(self.counters.to_dict(), {
+            'messages_processed': 1,
+            'processing_errors': 0,
+            'last_processing_time': "2025-06-03T10:00:00",
+            'kafka_send_errors': 0,
+            'stream_status': 'running'
+        })
+
+    def test_json_bytes(self):
+        """Test that serialized metrics are reused until a counter changes."""
+        first = self.counters.json_bytes()
+        self.assertEqual(json.loads(first), self.counters.to_dict())
+        self.assertIs(self.counters.json_bytes(), first)
+
+        self.counters.inc(MESSAGES_PROCESSED)
+        second = self.counters.json_bytes()
+        self.assertIsNot(second, first)
+        self.assertEqual(json.loads(second)['messages_processed'], 1)
+
+        self.counters.last_processing_time = "2025-06-03T10:00:00"
+        self.assertEqual(json.loads(self.counters.json_bytes())['last_processing_time'],
+                         "2025-06-03T10:00:00")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,11 +10,15 @@ import os
 from typing import List, Dict, Any
 
 # Add project root to Python path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 from backend.src.connectors.sqs_simulator_connector import SQSSimulatorConnector
 # Update import path to use test-data folder
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'test-data'))
+TEST_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'test-data'))
+if TEST_DATA_DIR not in sys.path:
+    sys.path.insert(0, TEST_DATA_DIR)
 from data_generator import TestDataGenerator
 
 # Configure logging
@@ -79,13 +83,8 @@ class SQSSimulatorTest:
         # Generate batch of test messages
         messages = TestDataGenerator.generate_batch(count, data_type)
         
-        # Send messages and collect IDs
-        message_ids = []
-        
-        for message in messages:
-            message_id = self.connector.send_message(message)
-            if message_id:
-                message_ids.append(message_id)
+        # Send messages in one batch and collect IDs
+        message_ids = [message_id for message_id in self.connector.send_messages(messages) if message_id]
         
         logger.info(f"Successfully sent {len(message_ids)} of {count} messages")
         
@@ -120,7 +119,7 @@ class SQSSimulatorTest:
         Returns:
             True if successful, False otherwise
         """
-        logger.info(f"Testing delete_message method for receipt handle: {receipt_handle[:15]}...")
+        logger.info("Testing delete_message method for receipt handle: %s...", receipt_handle[:15])
         
         # Delete message
         result = self.connector.delete_message(receipt_handle)
@@ -132,6 +131,25 @@ class SQSSimulatorTest:
             
         return result
     
+    def test_delete_messages(self, receipt_handles: List[str]) -> List[bool]:
+        """
+        Test deleting a batch of messages from the SQS simulator.
+        
+        Args:
+            receipt_handles: Receipt handles of the messages to delete
+            
+        Returns:
+            List with True for each message that was deleted, False otherwise
+        """
+        logger.info(f"Testing delete_messages method for {len(receipt_handles)} receipt handles")
+        
+        # Delete messages
+        results = self.connector.delete_messages(receipt_handles)
+        
+        logger.info(f"Deleted {sum(results)} of {len(receipt_handles)} messages")
+            
+        return results
+    
     def test_send_receive_delete_cycle(self, count: int = 5) -> bool:
         """
         Test the complete send-receive-delete message cycle.
@@ -151,31 +169,30 @@ class SQSSimulatorTest:
             logger.error(f"Failed to send all {count} messages, only sent {len(sent_ids)}")
             return False
         
-        # Step 2: Wait a moment for messages to be available
+        # Step 2: Receive messages, polling until all of them are available
+        # or 2 seconds pass
         logger.info("Waiting for messages to be available...")
-        time.sleep(2)
-        
-        # Step 3: Receive messages
-        received_messages = self.test_receive_messages(max_messages=count)
+        received_messages = []
+        deadline = time.monotonic() + 2
+        while len(received_messages) < count and time.monotonic() < deadline:
+            received_messages.extend(self.connector.receive_messages(
+                max_messages=count - len(received_messages), wait_time=0.1))
+        logger.info(f"Received {len(received_messages)} messages")
         
         if len(received_messages) == 0:
             logger.error("Failed to receive any messages")
             return False
         
-        # Step 4: Delete received messages
-        delete_success = True
-        
-        for message in received_messages:
-            receipt_handle = message['receipt_handle']
-            if not self.test_delete_message(receipt_handle):
-                delete_success = False
+        # Step 3: Delete received messages in one batch
+        results = self.test_delete_messages([message['receipt_handle'] for message in received_messages])
+        delete_success = all(results)
                 
         if delete_success:
             logger.info("All messages were successfully deleted")
         else:
             logger.warning("Some messages could not be deleted")
         
-        # Step 5: Verify deletion by trying to receive them again
+        # Step 4: Verify deletion by trying to receive them again
         logger.info("Verifying deletion by trying to receive messages again...")
         verification_messages = self.test_receive_messages(max_messages=count)
         
@@ -11,13 +11,17 @@ import threading
 from typing import List, Dict, Any
 
 # Add project root to Python path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
 from backend.src.connectors.sqs_simulator_connector import SQSSimulatorConnector
 from backend.src.connectors.kafka_connector import KafkaConnector
 from backend.src.utils.test_stream_processor import TestStreamProcessor
 # Update import path to use test-data folder
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'test-data'))
+TEST_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'test-data'))
+if TEST_DATA_DIR not in sys.path:
+    sys.path.insert(0, TEST_DATA_DIR)
 from data_generator import TestDataGenerator
 
 # Configure logging